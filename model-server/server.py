@@ -1,13 +1,14 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 
-app = FastAPI(title="Model Server Stub")
+app = FastAPI(title="Model Server Stub", default_response_class=ORJSONResponse)
 
 class AskIn(BaseModel):
     query: str
 
 @app.post("/ask")
-def ask(req: AskIn):
+async def ask(req: AskIn) -> dict:
     # Dummy scoring logic
     return {
         "response": f"Stub model thinks: '{req.query}'",
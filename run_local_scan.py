@@ -37,7 +37,7 @@ async def main():
         
         # Save results
         output_file = "test_scan/scan_results.json"
-        manager.save_results(output_file)
+        await manager.save_results(output_file)
         
         print(f"\nScan {'completed successfully' if success else 'failed'}")
         print(f"Results saved to: {output_file}")
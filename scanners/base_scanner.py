@@ -17,12 +17,45 @@ class BaseScanner(ABC):
         self.scan_id: str = f"scan_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
         self.results: List[Dict[str, Any]] = []
         self.errors: List[str] = []
+        # When set, findings are also pushed here as they are recorded
+        self._result_queue: Optional[asyncio.Queue] = None
+        # self.results as of attach_result_queue, and how much of it has been queued
+        self._streamed_results: Optional[List[Dict[str, Any]]] = None
+        self._queued = 0
         
     @abstractmethod
     async def scan(self) -> bool:
         """Perform the scan and return True if successful."""
         pass
     
+    def attach_result_queue(self, queue: asyncio.Queue) -> None:
+        """Stream findings recorded from now on to ``queue``; earlier ones are not re-sent."""
+        self._result_queue = queue
+        self._streamed_results = self.results
+        self._queued = len(self.results)
+    
+    def detach_result_queue(self) -> None:
+        """Queue results stored without add_result since attaching, then stop streaming."""
+        self._flush_results()
+        self._result_queue = None
+        self._streamed_results = None
+    
+    def add_result(self, result: Dict[str, Any]) -> None:
+        """Record a finding, streaming it to the result queue if one is attached."""
+        self.results.append(result)
+        self._flush_results()
+    
+    def _flush_results(self) -> None:
+        if self._result_queue is None:
+            return
+        if self.results is not self._streamed_results:
+            # The scanner replaced self.results wholesale, so all of it is new
+            self._streamed_results = self.results
+            self._queued = 0
+        for result in self.results[self._queued:]:
+            self._result_queue.put_nowait(result)
+        self._queued = len(self.results)
+    
     def get_results(self) -> List[Dict[str, Any]]:
         """Get the scan results."""
         return self.results
@@ -55,6 +88,7 @@ class BaseScanner(ABC):
         try:
             process = await asyncio.create_subprocess_exec(
                 *command,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
@@ -63,6 +97,7 @@ class BaseScanner(ABC):
                 stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
             except asyncio.TimeoutError:
                 process.kill()
+                await process.wait()
                 raise RuntimeError(f"Command timed out after {timeout} seconds")
                 
             return {
@@ -2,6 +2,7 @@ import asyncio
 import hashlib
 import logging
 import os
+import re
 import stat
 from datetime import datetime
 from pathlib import Path
@@ -46,6 +47,9 @@ class FileIntegrityMonitor(BaseScanner):
                    - hashing_algorithm: Hash algorithm to use (default: sha256)
                    - check_permissions: Whether to check file permissions (default: True)
                    - check_ownership: Whether to check file ownership (default: True)
+                   - incremental: Reuse the baseline hash for files whose size, mtime,
+                     ctime, inode and device are unchanged (default: False)
+                   - force_reindex: Re-hash every file even when incremental (default: False)
         """
         super().__init__(config)
         self.baseline_file = baseline_file or os.path.expanduser("~/.fim_baseline.json")
@@ -54,6 +58,7 @@ class FileIntegrityMonitor(BaseScanner):
         self.hashing_algorithm = self.config.get("hashing_algorithm", "sha256").lower()
         self.check_permissions = self.config.get("check_permissions", True)
         self.check_ownership = self.config.get("check_ownership", True)
+        self.incremental = self.config.get("incremental", False) and not self.config.get("force_reindex", False)
         self.baseline: Dict[str, Dict[str, Any]] = {}
         self.current_state: Dict[str, Dict[str, Any]] = {}
         
@@ -73,7 +78,7 @@ class FileIntegrityMonitor(BaseScanner):
             # Save new baseline if this is the first run
             if not self.baseline:
                 self._save_baseline()
-                self.results.append({
+                self.add_result({
                     "type": "fim_baseline_created",
                     "severity": "info",
                     "message": "Initial file integrity baseline created",
@@ -166,14 +171,17 @@ class FileIntegrityMonitor(BaseScanner):
             # Get file stats
             stat_info = os.stat(file_path)
             
-            # Calculate file hash
-            file_hash = self._calculate_hash(file_path)
+            # Calculate file hash, unless the file is provably untouched since the baseline
+            file_hash = self._cached_hash(file_path, stat_info) if self.incremental else None
+            if file_hash is None:
+                file_hash = self._calculate_hash(file_path)
             
             # Store file info
             self.current_state[file_path] = {
                 "hash": file_hash,
                 "size": stat_info.st_size,
                 "modified": stat_info.st_mtime,
+                "changed": stat_info.st_ctime,
                 "permissions": oct(stat_info.st_mode & 0o777),
                 "uid": stat_info.st_uid,
                 "gid": stat_info.st_gid,
@@ -186,6 +194,21 @@ class FileIntegrityMonitor(BaseScanner):
         except Exception as e:
             logger.error(f"Error processing file {file_path}: {str(e)}", exc_info=True)
     
+    def _cached_hash(self, file_path: str, stat_info: os.stat_result) -> Optional[str]:
+        """Return the baseline hash if the file's metadata shows it has not changed."""
+        baseline_info = self.baseline.get(file_path)
+        if baseline_info is None or baseline_info.get("changed") is None:
+            return None
+        
+        # Any write updates ctime, so matching metadata means matching content
+        if (baseline_info["size"] == stat_info.st_size and
+                baseline_info["modified"] == stat_info.st_mtime and
+                baseline_info["changed"] == stat_info.st_ctime and
+                baseline_info["inode"] == stat_info.st_ino and
+                baseline_info["device"] == stat_info.st_dev):
+            return baseline_info["hash"]
+        return None
+    
     def _calculate_hash(self, file_path: str) -> str:
         """Calculate the hash of a file."""
         hash_func = getattr(hashlib, self.hashing_algorithm, hashlib.sha256)
@@ -207,14 +230,14 @@ class FileIntegrityMonitor(BaseScanner):
         # Check for modified files
         for file_path, current_info in self.current_state.items():
             if file_path not in self.baseline:
-                self.results.append(self._create_result("file_added", file_path, current_info))
+                self.add_result(self._create_result("file_added", file_path, current_info))
                 continue
                 
             baseline_info = self.baseline[file_path]
             
             # Check file hash
             if current_info["hash"] != baseline_info["hash"]:
-                self.results.append(self._create_result(
+                self.add_result(self._create_result(
                     "file_modified",
                     file_path,
                     current_info,
@@ -223,7 +246,7 @@ class FileIntegrityMonitor(BaseScanner):
             
             # Check file permissions if enabled
             if self.check_permissions and current_info["permissions"] != baseline_info["permissions"]:
-                self.results.append(self._create_result(
+                self.add_result(self._create_result(
                     "permissions_changed",
                     file_path,
                     current_info,
@@ -238,7 +261,7 @@ class FileIntegrityMonitor(BaseScanner):
             if self.check_ownership and \
                (current_info["uid"] != baseline_info["uid"] or 
                 current_info["gid"] != baseline_info["gid"]):
-                self.results.append(self._create_result(
+                self.add_result(self._create_result(
                     "ownership_changed",
                     file_path,
                     current_info,
@@ -253,7 +276,7 @@ class FileIntegrityMonitor(BaseScanner):
         
         # Check for deleted files
         for file_path in set(self.baseline.keys()) - set(self.current_state.keys()):
-            self.results.append(self._create_result(
+            self.add_result(self._create_result(
                 "file_deleted",
                 file_path,
                 None,
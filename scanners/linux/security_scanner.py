@@ -13,18 +13,21 @@ Integrates multiple security tools:
 """
 
 import asyncio
+import functools
 import json
 import os
-import re
-import shutil
 import subprocess
-import tempfile
 import time
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, List, Optional, Any, Tuple
 
 import httpx
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
 try:
     import yaml
 except ImportError:
@@ -54,8 +57,92 @@ if str(scanners_dir) not in sys.path:
 
 try:
     from scanners.base_scanner import BaseScanner
+    from scanners.log_tail import (
+        iter_log_lines, load_log_offsets, record_offset, resume_offset, save_log_offsets
+    )
 except ImportError:
-    from base_scanner import BaseScanner
+    from base_scanner import BaseScanner  # type: ignore[no-redef]
+    from log_tail import (  # type: ignore[no-redef]
+        iter_log_lines, load_log_offsets, record_offset, resume_offset, save_log_offsets
+    )
+
+def _strip_port(endpoint: bytes) -> bytes:
+    """Drop the port from "ipv4:port" or "[ipv6]:port".
+    
+    An unbracketed IPv6 endpoint is kept whole: its last group cannot be
+    told apart from a port.
+    """
+    if endpoint.startswith(b'['):
+        end = endpoint.find(b']')
+        return endpoint[1:end] if end > 0 else endpoint
+    if endpoint.count(b':') == 1:
+        return endpoint.partition(b':')[0]
+    return endpoint
+
+
+def _parse_fast_log_line(line: bytes) -> Optional[Dict[str, Any]]:
+    """Tokenize one Suricata fast.log line on its fixed separators.
+    
+    Example: 01/01-12:00:00.123456  [**] [1:1000001:1] TEST Alert [**] [Classification: Generic Event] [Priority: 3] {TCP} 192.168.1.1:1234 -> 192.168.1.2:80
+    
+    Returns None for lines that are not alerts.
+    """
+    first = line.find(b'[**]')
+    if first < 0:
+        return None
+    second = line.find(b'[**]', first + 4)
+    if second < 0:
+        return None
+    
+    # "[gid:sid:rev] Signature text" between the two [**] markers
+    header = line[first + 4:second].strip()
+    gid_end = header.find(b']')
+    if not header.startswith(b'[') or gid_end < 0:
+        return None
+    
+    priority_start = line.find(b'[Priority:', second)
+    if priority_start < 0:
+        return None
+    priority_end = line.find(b']', priority_start)
+    proto_end = line.find(b'}', priority_end)
+    arrow = line.find(b'->', proto_end)
+    if priority_end < 0 or proto_end < 0 or arrow < 0:
+        return None
+    
+    try:
+        severity = int(line[priority_start + 10:priority_end])
+    except ValueError:
+        return None
+    
+    # Strip the ":port" suffix from both endpoints (ICMP alerts carry none)
+    source_ip = _strip_port(line[proto_end + 1:arrow].strip())
+    dest_ip = _strip_port(line[arrow + 2:].strip())
+    
+    return {
+        "timestamp": line[:first].strip().decode('utf-8', errors='ignore'),
+        "signature": header[gid_end + 1:].strip().decode('utf-8', errors='ignore'),
+        "severity": severity,
+        "source_ip": source_ip.decode('ascii', errors='ignore'),
+        "dest_ip": dest_ip.decode('ascii', errors='ignore'),
+        "details": line.strip().decode('utf-8', errors='ignore')
+    }
+
+
+@functools.lru_cache(maxsize=4)
+def _load_yara_rules(rules_dir: str, mtime_fingerprint: int):
+    """Compile YARA rules once per process and rules-directory revision.
+    
+    ``mtime_fingerprint`` is only part of the cache key, so editing a rule
+    file invalidates the cached compilation.
+    """
+    return yara.compile(rules_dir)
+
+
+def _rules_fingerprint(rules_dir: str) -> int:
+    """Newest modification time of the rule files under ``rules_dir``."""
+    mtimes = [p.stat().st_mtime_ns for p in Path(rules_dir).rglob('*.yar*')]
+    return max(mtimes, default=os.stat(rules_dir).st_mtime_ns)
+
 
 class SecurityScanner(BaseScanner):
     """Comprehensive security scanner for Linux systems."""
@@ -63,15 +150,16 @@ class SecurityScanner(BaseScanner):
     def __init__(self, config: Dict[str, Any] = None):
         """Initialize the security scanner with configuration."""
         super().__init__(config)
-        self.temp_dir = tempfile.mkdtemp(prefix="security_scan_")
         self.api_url = self.config.get("api_url", "http://backend:8000/events")
+        # Shared HTTP client for event posts, created on first use
+        self._http_client: Optional[httpx.AsyncClient] = None
         
         # Initialize YARA rules if configured
-        self.yara_rules = None
+        self.yara_rules: Any = None
         yara_rules_dir = self.config.get("yara_rules_dir", "/etc/yara-rules")
         if os.path.isdir(yara_rules_dir):
             try:
-                self.yara_rules = yara.compile(yara_rules_dir)
+                self.yara_rules = _load_yara_rules(yara_rules_dir, _rules_fingerprint(yara_rules_dir))
             except Exception as e:
                 self.errors.append(f"Failed to load YARA rules: {str(e)}")
     
@@ -107,13 +195,13 @@ class SecurityScanner(BaseScanner):
             self.errors.append(f"Scan failed: {str(e)}")
             return False
         finally:
-            # Clean up temporary files
-            if os.path.exists(self.temp_dir):
-                shutil.rmtree(self.temp_dir, ignore_errors=True)
+            if self._http_client is not None:
+                await self._http_client.aclose()
+                self._http_client = None
     
     # --- Individual Scanner Implementations ---
     
-    async def scan_nmap(self):
+    async def scan_nmap(self) -> None:
         """Run Nmap network scan."""
         # Default to scanning common network ranges or specific targets
         default_targets = self.config.get("scan_mode") == "network" and ["192.168.1.0/24"] or ["127.0.0.1"]
@@ -123,8 +211,8 @@ class SecurityScanner(BaseScanner):
         args = self.config.get("nmap", {}).get("arguments", "-T4 -sV")
         
         for target in targets:
-            output_file = os.path.join(self.temp_dir, f"nmap_{target.replace('.', '_')}.xml")
-            cmd = ["nmap", "-p", str(ports), *args.split(), "-oX", output_file, target]
+            # Write the XML report to stdout and parse it from memory
+            cmd = ["nmap", "-p", str(ports), *args.split(), "-oX", "-", target]
             
             try:
                 result = await self.run_command(cmd, timeout=600)
@@ -133,7 +221,7 @@ class SecurityScanner(BaseScanner):
                     continue
                 
                 # Parse the Nmap results
-                await self._parse_nmap_results(output_file, target)
+                await self._parse_nmap_results(result["stdout"], target)
                 
             except Exception as e:
                 self.errors.append(f"Error running Nmap scan for {target}: {str(e)}")
@@ -142,19 +230,19 @@ class SecurityScanner(BaseScanner):
                     self.errors.append(traceback.format_exc())
                 continue
     
-    async def _parse_nmap_results(self, xml_file: str, target: str):
+    async def _parse_nmap_results(self, xml_data: str, target: str) -> None:
         """Parse Nmap XML output and create events."""
         try:
             import xml.etree.ElementTree as ET
             
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
+            root = ET.fromstring(xml_data)
             
             for host in root.findall('host'):
                 # Parse host information
-                host_info = {
+                status = host.find('status')
+                host_info: Dict[str, Any] = {
                     'target': target,
-                    'status': host.find('status').get('state', 'unknown') if host.find('status') is not None else 'unknown',
+                    'status': status.get('state', 'unknown') if status is not None else 'unknown',
                     'address': None,
                     'hostnames': [],
                     'ports': []
@@ -179,11 +267,13 @@ class SecurityScanner(BaseScanner):
                 ports = host.find('ports')
                 if ports is not None:
                     for port in ports.findall('port'):
+                        state_el = port.find('state')
+                        service_el = port.find('service')
                         port_info = {
                             'port': port.get('portid'),
                             'protocol': port.get('protocol'),
-                            'state': port.find('state').get('state') if port.find('state') is not None else 'unknown',
-                            'service': port.find('service').get('name') if port.find('service') is not None else 'unknown'
+                            'state': state_el.get('state') if state_el is not None else 'unknown',
+                            'service': service_el.get('name') if service_el is not None else 'unknown'
                         }
                         host_info['ports'].append(port_info)
                 
@@ -197,7 +287,7 @@ class SecurityScanner(BaseScanner):
                     'timestamp': datetime.utcnow().isoformat()
                 }
                 
-                self.results.append(result)
+                self.add_result(result)
                 await self._post_event("nmap", "port_scan", result)
                         
         except Exception as e:
@@ -206,7 +296,7 @@ class SecurityScanner(BaseScanner):
                 import traceback
                 self.errors.append(traceback.format_exc())
     
-    async def scan_clamav(self):
+    async def scan_clamav(self) -> None:
         """Run ClamAV antivirus scan."""
         paths = self.config.get("clamav", {}).get("paths", ["/tmp", "/home", "/var/www"])
         
@@ -215,15 +305,14 @@ class SecurityScanner(BaseScanner):
                 self.errors.append(f"ClamAV path does not exist: {path}")
                 continue
                 
-            output_file = os.path.join(self.temp_dir, f"clamav_{os.path.basename(path)}.log")
-            cmd = ["clamscan", "-r", "--no-summary", "--log", output_file, path]
+            # Only infected files are printed, parse them straight from stdout
+            cmd = ["clamscan", "-r", "--no-summary", "--infected", path]
             
             try:
                 result = await self.run_command(cmd, timeout=3600)  # 1 hour timeout for full scans
                 
                 # Parse results
-                with open(output_file, 'r') as f:
-                    scan_results = f.read()
+                scan_results = result["stdout"]
                 
                 infected_files = []
                 for line in scan_results.splitlines():
@@ -248,15 +337,14 @@ class SecurityScanner(BaseScanner):
                             "scan_output": scan_results
                         }
                     }
-                    self.results.append(result)
+                    self.add_result(result)
                     await self._post_event("clamav", "malware_detected", result)
                 
             except Exception as e:
                 self.errors.append(f"ClamAV scan error on {path}: {str(e)}")
     
-    async def scan_chkrootkit(self):
+    async def scan_chkrootkit(self) -> None:
         """Run chkrootkit to detect rootkits."""
-        output_file = os.path.join(self.temp_dir, "chkrootkit.log")
         cmd = ["chkrootkit", "-q"]
         
         try:
@@ -280,15 +368,14 @@ class SecurityScanner(BaseScanner):
                         "stderr": result["stderr"]
                     }
                 }
-                self.results.append(result)
+                self.add_result(result)
                 await self._post_event("chkrootkit", "rootkit_scan", result)
                 
         except Exception as e:
             self.errors.append(f"chkrootkit scan error: {str(e)}")
     
-    async def scan_rkhunter(self):
+    async def scan_rkhunter(self) -> None:
         """Run RKHunter to detect rootkits and backdoors."""
-        output_file = os.path.join(self.temp_dir, "rkhunter.log")
         cmd = ["rkhunter", "--check", "--sk", "--nocolors", "--report-warnings-only"]
         
         try:
@@ -312,13 +399,13 @@ class SecurityScanner(BaseScanner):
                         "stderr": result["stderr"]
                     }
                 }
-                self.results.append(result)
+                self.add_result(result)
                 await self._post_event("rkhunter", "rootkit_scan", result)
                 
         except Exception as e:
             self.errors.append(f"RKHunter scan error: {str(e)}")
     
-    async def scan_yara(self):
+    async def scan_yara(self) -> None:
         """Run YARA rules against files."""
         if not self.yara_rules:
             self.errors.append("No YARA rules loaded")
@@ -337,11 +424,11 @@ class SecurityScanner(BaseScanner):
                 if os.path.isfile(path):
                     # Scan single file
                     try:
-                        file_matches = self.yara_rules.match(path)
+                        file_matches = self._match_yara(path)
                         if file_matches:
                             matches.append({
                                 "file": path,
-                                "matches": [{"rule": str(m), "tags": m.tags, "meta": m.meta} for m in file_matches]
+                                "matches": file_matches
                             })
                     except Exception as e:
                         self.errors.append(f"Error scanning {path} with YARA: {str(e)}")
@@ -351,11 +438,11 @@ class SecurityScanner(BaseScanner):
                         for file in files:
                             file_path = os.path.join(root, file)
                             try:
-                                file_matches = self.yara_rules.match(file_path)
+                                file_matches = self._match_yara(file_path)
                                 if file_matches:
                                     matches.append({
                                         "file": file_path,
-                                        "matches": [{"rule": str(m), "tags": m.tags, "meta": m.meta} for m in file_matches]
+                                        "matches": file_matches
                                     })
                             except Exception as e:
                                 # Skip files that can't be read
@@ -371,19 +458,50 @@ class SecurityScanner(BaseScanner):
                             "matches": matches
                         }
                     }
-                    self.results.append(result)
+                    self.add_result(result)
                     await self._post_event("yara", "malware_detected", result)
                     
             except Exception as e:
                 self.errors.append(f"YARA scan error on {path}: {str(e)}")
     
-    async def scan_suricata(self):
+    def _match_yara(self, file_path: str) -> List[Dict[str, Any]]:
+        """Match the loaded YARA rules against a single file.
+        
+        By default this is a triage match that stops at the first hit. Set
+        ``yara.deep_scan`` to evaluate every rule and report all matches.
+        """
+        if self.config.get("yara", {}).get("deep_scan", False):
+            return [
+                {"rule": str(m), "tags": m.tags, "meta": m.meta}
+                for m in self.yara_rules.match(file_path)
+            ]
+        
+        hits: List[Dict[str, Any]] = []
+        
+        def _on_match(data: Dict[str, Any]) -> int:
+            hits.append({"rule": data["rule"], "tags": data["tags"], "meta": data["meta"]})
+            return yara.CALLBACK_ABORT
+        
+        self.yara_rules.match(
+            file_path,
+            callback=_on_match,
+            which_callbacks=yara.CALLBACK_MATCHES,
+            fast=True
+        )
+        return hits
+    
+    async def scan_suricata(self) -> None:
         """Check Suricata logs for alerts."""
-        log_paths = self.config.get("suricata", {}).get(
+        suricata_config = self.config.get("suricata", {})
+        log_paths = suricata_config.get(
             "log_paths", 
             ["/var/log/suricata/fast.log", "/var/log/suricata/eve.json"]
         )
         
+        # Optional state file so scheduled scans only parse newly appended data
+        state_file = suricata_config.get("state_file")
+        offsets = load_log_offsets(state_file) if state_file else {}
+        
         alerts = []
         
         for log_path in log_paths:
@@ -391,45 +509,25 @@ class SecurityScanner(BaseScanner):
                 continue
                 
             try:
-                if log_path.endswith(".json"):
-                    # Parse JSON-based logs (eve.json)
-                    with open(log_path, 'r') as f:
-                        for line in f:
-                            try:
-                                entry = json.loads(line.strip())
-                                if entry.get("event_type") == "alert":
-                                    alerts.append({
-                                        "timestamp": entry.get("timestamp"),
-                                        "signature": entry.get("alert", {}).get("signature"),
-                                        "severity": entry.get("alert", {}).get("severity", 3),
-                                        "source_ip": entry.get("src_ip"),
-                                        "dest_ip": entry.get("dest_ip"),
-                                        "details": entry
-                                    })
-                            except json.JSONDecodeError:
-                                continue
-                else:
-                    # Parse plaintext logs (fast.log)
-                    with open(log_path, 'r') as f:
-                        for line in f:
-                            # Example: 01/01-12:00:00.123456  [**] [1:1000001:1] TEST Alert [**] [Classification: Generic Event] [Priority: 3] {TCP} 192.168.1.1:1234 -> 192.168.1.2:80
-                            match = re.match(
-                                r'^(\d+/\d+-\d+:\d+:\d+\.\d+)\s+\[\*\*\]\s+\[(\d+):(\d+):(\d+)\]\s+(.+?)\s+\[\*\*\]\s+\[Classification:([^\]]+)\]\s+\[Priority:\s*(\d+)\]\s+\{(\w+)\}\s+(\d+\.\d+\.\d+\.\d+):(\d+)\s+->\s+(\d+\.\d+\.\d+\.\d+):(\d+)',
-                                line
-                            )
-                            if match:
-                                alerts.append({
-                                    "timestamp": match.group(1),
-                                    "signature": match.group(5).strip(),
-                                    "severity": int(match.group(7)),
-                                    "source_ip": match.group(9),
-                                    "dest_ip": match.group(11),
-                                    "details": line.strip()
-                                })
+                stat = os.stat(log_path)
+                offset = resume_offset(offsets, log_path, stat)
+                
+                # Parsing a multi-GB log is blocking work, keep it off the event loop
+                log_alerts, offset = await asyncio.to_thread(
+                    self._parse_suricata_log, log_path, offset
+                )
+                alerts.extend(log_alerts)
+                record_offset(offsets, log_path, stat, offset)
                 
             except Exception as e:
                 self.errors.append(f"Error reading Suricata log {log_path}: {str(e)}")
         
+        if state_file:
+            try:
+                save_log_offsets(state_file, offsets)
+            except OSError as e:
+                self.errors.append(f"Failed to save Suricata state file {state_file}: {str(e)}")
+        
         if alerts:
             result = {
                 "type": "ids_alert",
@@ -440,12 +538,45 @@ class SecurityScanner(BaseScanner):
                     "total_alerts": len(alerts)
                 }
             }
-            self.results.append(result)
+            self.add_result(result)
             await self._post_event("suricata", "ids_alert", result)
     
-    async def scan_lynis(self):
+    def _parse_suricata_log(self, log_path: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Parse alerts from a Suricata log starting at byte ``offset``.
+        
+        Returns the alerts found and the offset to resume from next time.
+        """
+        alerts = []
+        loads = orjson.loads if orjson else json.loads
+        
+        if log_path.endswith(".json"):
+            # Parse JSON-based logs (eve.json)
+            for line, offset in iter_log_lines(log_path, offset):
+                try:
+                    entry = loads(line)
+                except ValueError:
+                    continue
+                if entry.get("event_type") == "alert":
+                    alert = entry.get("alert", {})
+                    alerts.append({
+                        "timestamp": entry.get("timestamp"),
+                        "signature": alert.get("signature"),
+                        "severity": alert.get("severity", 3),
+                        "source_ip": entry.get("src_ip"),
+                        "dest_ip": entry.get("dest_ip"),
+                        "details": entry
+                    })
+        else:
+            # Parse plaintext logs (fast.log)
+            for line, offset in iter_log_lines(log_path, offset):
+                alert = _parse_fast_log_line(line)
+                if alert is not None:
+                    alerts.append(alert)
+        
+        return alerts, offset
+    
+    async def scan_lynis(self) -> None:
         """Run Lynis system audit."""
-        output_file = os.path.join(self.temp_dir, "lynis.log")
         cmd = ["lynis", "audit", "system", "--quick"]
         
         try:
@@ -483,7 +614,7 @@ class SecurityScanner(BaseScanner):
                         "scan_output": result["stdout"]
                     }
                 }
-                self.results.append(result)
+                self.add_result(result)
                 await self._post_event("lynis", "security_audit", result)
                 
         except Exception as e:
@@ -491,7 +622,7 @@ class SecurityScanner(BaseScanner):
     
     # --- Helper Methods ---
     
-    async def _post_event(self, source: str, event_type: str, data: Dict[str, Any]):
+    async def _post_event(self, source: str, event_type: str, data: Dict[str, Any]) -> None:
         """Post scan event to the API."""
         event = {
             "source": source,
@@ -500,16 +631,21 @@ class SecurityScanner(BaseScanner):
         }
         
         try:
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                response = await client.post(
-                    self.api_url,
-                    json=event
+            # Reuse one pooled keep-alive connection for every event of the scan
+            if self._http_client is None:
+                self._http_client = httpx.AsyncClient(
+                    timeout=60.0,
+                    limits=httpx.Limits(max_keepalive_connections=4, keepalive_expiry=60.0)
                 )
-                if response.status_code >= 400:
-                    self.errors.append(f"Failed to post event to {self.api_url}: HTTP {response.status_code} - {response.text}")
-                elif response.status_code == 200:
-                    # Successfully posted
-                    pass
+            response = await self._http_client.post(
+                self.api_url,
+                json=event
+            )
+            if response.status_code >= 400:
+                self.errors.append(f"Failed to post event to {self.api_url}: HTTP {response.status_code} - {response.text}")
+            elif response.status_code == 200:
+                # Successfully posted
+                pass
         except httpx.TimeoutException as e:
             self.errors.append(f"Timeout posting event to {self.api_url}: {str(e)}")
         except httpx.ConnectError as e:
@@ -0,0 +1,64 @@
+"""
+Incremental reading of append-only logs such as Suricata's fast.log and
+eve.json: each scan resumes from the byte offset the previous one reached.
+"""
+
+import json
+import mmap
+import os
+from typing import Dict, Iterator, Tuple
+
+# {log_path: {"inode": ..., "offset": ...}}
+LogOffsets = Dict[str, Dict[str, int]]
+
+
+def iter_log_lines(log_path: str, offset: int = 0) -> Iterator[Tuple[bytes, int]]:
+    """Yield ``(line, next_offset)`` for every complete line after ``offset``.
+    
+    The file is memory-mapped and sliced on newline positions, so lines are
+    handed out as raw bytes without going through the text decoder. A trailing
+    line without a newline is still being written and is left for the next run.
+    """
+    with open(log_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size <= offset:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            find = mm.find
+            start = offset
+            while True:
+                end = find(b'\n', start)
+                if end < 0:
+                    break
+                if end > start:
+                    yield mm[start:end], end + 1
+                start = end + 1
+
+
+def load_log_offsets(state_file: str) -> LogOffsets:
+    """Load per-log byte offsets saved by a previous scan."""
+    try:
+        with open(state_file, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_log_offsets(state_file: str, offsets: LogOffsets) -> None:
+    """Persist per-log byte offsets for the next scan."""
+    os.makedirs(os.path.dirname(state_file) or ".", exist_ok=True)
+    with open(state_file, 'w') as f:
+        json.dump(offsets, f)
+
+
+def resume_offset(offsets: LogOffsets, log_path: str, stat: os.stat_result) -> int:
+    """Return the offset to resume ``log_path`` from; 0 if it was rotated or truncated."""
+    state = offsets.get(log_path, {})
+    offset = state.get('offset', 0)
+    if state.get('inode') != stat.st_ino or offset > stat.st_size:
+        return 0
+    return offset
+
+
+def record_offset(offsets: LogOffsets, log_path: str, stat: os.stat_result, offset: int) -> None:
+    """Remember how far ``log_path`` has been read."""
+    offsets[log_path] = {'inode': stat.st_ino, 'offset': offset}
@@ -94,26 +94,16 @@ class LynisScanner(BaseScanner):
                 self.errors.append(error_msg)
                 return False
                 
-            # Parse the JSON report
-            json_report = report_dir / "lynis-report.json"
-            if json_report.exists():
-                with open(json_report, 'r') as f:
-                    report_data = json.load(f)
-                self.report_file = str(json_report)
-                self.results = self._process_results(report_data)
-            else:
-                # Fallback to parsing text report if JSON is not available
-                txt_report = report_dir / "lynis-report.txt"
-                if txt_report.exists():
-                    with open(txt_report, 'r') as f:
-                        report_text = f.read()
-                    self.results = self._parse_text_report(report_text)
-                else:
-                    error_msg = "No report file generated by Lynis"
-                    logger.error(error_msg)
-                    self.errors.append(error_msg)
-                    return False
+            # Read and parse the report on a worker thread so a large report
+            # doesn't hold up the event loop (and other scanners) meanwhile
+            results = await asyncio.to_thread(self._load_report, report_dir)
+            if results is None:
+                error_msg = "No report file generated by Lynis"
+                logger.error(error_msg)
+                self.errors.append(error_msg)
+                return False
             
+            self.results = results
             return True
             
         except Exception as e:
@@ -122,6 +112,24 @@ class LynisScanner(BaseScanner):
             self.errors.append(error_msg)
             return False
     
+    def _load_report(self, report_dir: Path) -> Optional[List[Dict[str, Any]]]:
+        """Parse the JSON report, or the text report if there is none; None if neither exists."""
+        json_report = report_dir / "lynis-report.json"
+        if json_report.exists():
+            with open(json_report, 'r') as f:
+                report_data = json.load(f)
+            self.report_file = str(json_report)
+            return self._process_results(report_data)
+        
+        # Fallback to parsing text report if JSON is not available
+        txt_report = report_dir / "lynis-report.txt"
+        if txt_report.exists():
+            with open(txt_report, 'r') as f:
+                report_text = f.read()
+            return self._parse_text_report(report_text)
+        
+        return None
+    
     def _process_results(self, report_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Process Lynis JSON report into a standardized format."""
         results = []
@@ -36,6 +36,7 @@ class SMBScanner:
         try:
             process = await asyncio.create_subprocess_exec(
                 *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
@@ -58,6 +59,7 @@ class SMBScanner:
         try:
             process = await asyncio.create_subprocess_exec(
                 *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
@@ -95,7 +97,7 @@ class SMBScanner:
         """Unmount SMB share."""
         try:
             cmd = ["umount", mount_point]
-            process = await asyncio.create_subprocess_exec(*cmd)
+            process = await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.DEVNULL)
             await process.communicate()
         except Exception as e:
             self.errors.append(f"Unmount error: {str(e)}")
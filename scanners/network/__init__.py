@@ -0,0 +1 @@
+# This file makes the network directory a Python package
@@ -10,52 +10,77 @@ import os
 import tempfile
 import shutil
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 import xml.etree.ElementTree as ET
 
+try:
+    import orjson
+except ImportError:
+    orjson = None  # type: ignore[assignment]
+
+try:
+    from scanners.log_tail import (
+        iter_log_lines, load_log_offsets, record_offset, resume_offset, save_log_offsets
+    )
+except ImportError:
+    from log_tail import (  # type: ignore[no-redef]
+        iter_log_lines, load_log_offsets, record_offset, resume_offset, save_log_offsets
+    )
+
 
 class NetworkScanner:
     """Network-focused security scanner."""
     
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
-        self.results = []
-        self.errors = []
+        self.results: List[Dict[str, Any]] = []
+        self.errors: List[str] = []
         self.temp_dir = tempfile.mkdtemp(prefix="network_scan_")
         
     async def run_command(self, cmd: List[str], timeout: int = 300) -> Dict[str, Any]:
-        """Execute a command asynchronously."""
+        """Execute a command asynchronously.
+        
+        ``stdout`` and ``stderr`` are returned as raw bytes; callers decode
+        only the parts they actually need as text.
+        """
         try:
             process = await asyncio.create_subprocess_exec(
                 *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
                 stderr=asyncio.subprocess.PIPE
             )
             
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
+            try:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=timeout
+                )
+            except asyncio.TimeoutError:
+                # Don't leave the timed-out process running
+                process.kill()
+                await process.wait()
+                raise
             
             return {
                 "returncode": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='ignore'),
-                "stderr": stderr.decode('utf-8', errors='ignore')
+                "stdout": stdout,
+                "stderr": stderr
             }
         except asyncio.TimeoutError:
             return {
                 "returncode": -1,
-                "stdout": "",
-                "stderr": f"Command timed out after {timeout} seconds"
+                "stdout": b"",
+                "stderr": f"Command timed out after {timeout} seconds".encode()
             }
         except Exception as e:
             return {
                 "returncode": -1,
-                "stdout": "",
-                "stderr": str(e)
+                "stdout": b"",
+                "stderr": str(e).encode()
             }
     
-    async def scan_nmap(self, targets: List[str], ports: str = "1-1000"):
+    async def scan_nmap(self, targets: List[str], ports: str = "1-1000") -> None:
         """Run Nmap network scan."""
         for target in targets:
             output_file = os.path.join(self.temp_dir, f"nmap_{target.replace('.', '_').replace('/', '_')}.xml")
@@ -64,7 +89,8 @@ class NetworkScanner:
             try:
                 result = await self.run_command(cmd, timeout=600)
                 if result["returncode"] != 0:
-                    self.errors.append(f"Nmap scan failed for {target}: {result['stderr']}")
+                    stderr = result['stderr'].decode('utf-8', errors='ignore')
+                    self.errors.append(f"Nmap scan failed for {target}: {stderr}")
                     continue
                 
                 # Parse XML output
@@ -73,13 +99,15 @@ class NetworkScanner:
                     root = tree.getroot()
                     
                     for host in root.findall('host'):
-                        address = host.find('address').get('addr')
+                        address_el = host.find('address')
+                        address = address_el.get('addr') if address_el is not None else None
                         ports_found = []
                         
                         for port in host.findall('.//port'):
-                            port_id = port.get('portid')
+                            port_id = port.get('portid', '0')
                             protocol = port.get('protocol')
-                            state = port.find('state').get('state')
+                            state_el = port.find('state')
+                            state = state_el.get('state') if state_el is not None else None
                             
                             service = port.find('service')
                             service_name = service.get('name') if service is not None else 'unknown'
@@ -105,42 +133,28 @@ class NetworkScanner:
             except Exception as e:
                 self.errors.append(f"Nmap scan error for {target}: {str(e)}")
     
-    async def scan_suricata(self, log_paths: List[str] = None):
-        """Check Suricata IDS/IPS logs for alerts."""
+    async def scan_suricata(self, log_paths: List[str] = None, state_file: str = None) -> None:
+        """Check Suricata IDS/IPS logs for alerts.
+        
+        When ``state_file`` is given, the byte offset reached in each log is
+        stored there so the next scan only parses newly appended lines.
+        """
         log_paths = log_paths or ["/var/log/suricata/fast.log", "/var/log/suricata/eve.json"]
-        alerts = []
+        
+        offsets = load_log_offsets(state_file) if state_file else {}
         
         for log_path in log_paths:
             if not os.path.exists(log_path):
                 continue
             
             try:
-                if log_path.endswith('.json'):
-                    # Parse JSON logs
-                    with open(log_path, 'r') as f:
-                        for line in f:
-                            try:
-                                event = json.loads(line)
-                                if event.get('event_type') == 'alert':
-                                    alerts.append({
-                                        'timestamp': event.get('timestamp'),
-                                        'signature': event.get('alert', {}).get('signature'),
-                                        'severity': event.get('alert', {}).get('severity'),
-                                        'category': event.get('alert', {}).get('category'),
-                                        'src_ip': event.get('src_ip'),
-                                        'dest_ip': event.get('dest_ip')
-                                    })
-                            except json.JSONDecodeError:
-                                continue
-                else:
-                    # Parse fast.log format
-                    with open(log_path, 'r') as f:
-                        for line in f:
-                            if '[**]' in line:
-                                alerts.append({
-                                    'raw': line.strip(),
-                                    'signature': line.split('[**]')[1].strip() if len(line.split('[**]')) > 1 else 'Unknown'
-                                })
+                stat = os.stat(log_path)
+                offset = resume_offset(offsets, log_path, stat)
+                
+                # Parsing a multi-GB log is blocking work, keep it off the event loop
+                alerts, offset = await asyncio.to_thread(self._parse_suricata_log, log_path, offset)
+                
+                record_offset(offsets, log_path, stat, offset)
                 
                 if alerts:
                     self.results.append({
@@ -154,8 +168,48 @@ class NetworkScanner:
                     
             except Exception as e:
                 self.errors.append(f"Suricata log parsing error for {log_path}: {str(e)}")
+        
+        if state_file:
+            try:
+                save_log_offsets(state_file, offsets)
+            except OSError as e:
+                self.errors.append(f"Failed to save Suricata state file {state_file}: {str(e)}")
+    
+    def _parse_suricata_log(self, log_path: str, offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """Parse alerts from a Suricata log starting at byte ``offset``."""
+        alerts = []
+        loads = orjson.loads if orjson else json.loads
+        
+        if log_path.endswith('.json'):
+            # Parse JSON logs
+            for line, offset in iter_log_lines(log_path, offset):
+                try:
+                    event = loads(line)
+                except ValueError:
+                    continue
+                if event.get('event_type') == 'alert':
+                    alert = event.get('alert', {})
+                    alerts.append({
+                        'timestamp': event.get('timestamp'),
+                        'signature': alert.get('signature'),
+                        'severity': alert.get('severity'),
+                        'category': alert.get('category'),
+                        'src_ip': event.get('src_ip'),
+                        'dest_ip': event.get('dest_ip')
+                    })
+        else:
+            # Parse fast.log format
+            for line, offset in iter_log_lines(log_path, offset):
+                parts = line.split(b'[**]')
+                if len(parts) > 1:
+                    alerts.append({
+                        'raw': line.strip().decode('utf-8', errors='ignore'),
+                        'signature': parts[1].strip().decode('utf-8', errors='ignore')
+                    })
+        
+        return alerts, offset
     
-    async def scan(self):
+    async def scan(self) -> None:
         """Run all network scans."""
         # Run Nmap if configured
         if 'nmap' in self.config:
@@ -166,7 +220,8 @@ class NetworkScanner:
         # Check Suricata logs if configured
         if 'suricata' in self.config:
             log_paths = self.config['suricata'].get('log_paths')
-            await self.scan_suricata(log_paths)
+            state_file = self.config['suricata'].get('state_file')
+            await self.scan_suricata(log_paths, state_file)
         
         # Cleanup
         if os.path.exists(self.temp_dir):
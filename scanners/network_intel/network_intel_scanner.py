@@ -5,15 +5,284 @@ Combines: Nmap, Tshark, Masscan, ARP scanning, DNS enumeration
 """
 
 import asyncio
+import concurrent.futures
+import functools
+from array import array
+import ipaddress
 import subprocess
 import json
+from collections import Counter
 import os
+import re
+import socket
 import tempfile
 import shutil
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Dict, Any, Awaitable, Callable, Iterator, List, Optional, Tuple
 import xml.etree.ElementTree as ET
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import dpkt
+except ImportError:
+    dpkt = None
+
+_IP_PROTOCOLS = {1: 'icmp', 6: 'tcp', 17: 'udp'}
+_PORT_PROTOCOLS = {53: 'dns', 80: 'http', 443: 'https'}
+_REPORTED_PROTOCOLS = frozenset(('tcp', 'udp', 'icmp', 'dns', 'http', 'https'))
+
+# "Nmap scan report for 10.0.0.1" or "Nmap scan report for host.lan (10.0.0.1)"
+_PING_RE = re.compile(r'^Nmap scan report for (?:\S+ \()?([^\s()]+)\)?\s*$', re.MULTILINE)
+
+
+def _iter_nmap_hosts(source) -> Iterator[Any]:
+    """Stream ``host`` elements from an Nmap XML report.
+    
+    Uses lxml when available and falls back to the stdlib parser. Each host is
+    cleared and detached from the tree once consumed, keeping memory bounded
+    by a single host.
+    """
+    if etree is not None:
+        context = etree.iterparse(source, events=("start", "end"), tag=("nmaprun", "host"))
+    else:
+        context = ET.iterparse(source, events=("start", "end"))
+    
+    root = None
+    for event, elem in context:
+        if event == "start":
+            if root is None:
+                root = elem
+            continue
+        
+        if elem.tag != "host":
+            continue
+        
+        yield elem
+        elem.clear()
+        root.remove(elem)
+
+
+if etree is not None:
+    # Compiled once; the state filter runs inside libxml2 rather than in Python
+    _OPEN_PORTS_XPATH = etree.XPath("ports/port[state/@state='open']")
+else:
+    _OPEN_PORTS_XPATH = None
+
+
+def _open_ports(host) -> List[Any]:
+    """Return the ``port`` elements of an Nmap ``host`` whose state is open."""
+    if _OPEN_PORTS_XPATH is not None:
+        return _OPEN_PORTS_XPATH(host)
+    ports = []
+    for port in host.findall('ports/port'):
+        state = port.find('state')
+        if state is not None and state.get('state') == 'open':
+            ports.append(port)
+    return ports
+
+
+def _iter_masscan_json(path: str) -> Iterator[Tuple[str, int, str, str]]:
+    """Stream open ports from a Masscan ``-oJ`` report one line at a time."""
+    loads = orjson.loads if orjson else json.loads
+    with open(path, 'rb') as f:
+        for raw in f:
+            raw = raw.strip().rstrip(b',')
+            if not raw or raw.startswith((b'#', b'[', b']')):
+                continue
+            try:
+                data = loads(raw)
+            except ValueError:
+                continue
+            ip = data.get('ip')
+            for port_info in data.get('ports', ()):
+                port = port_info.get('port')
+                if ip is None or port is None:
+                    continue
+                yield ip, port, port_info.get('proto'), port_info.get('status')
+
+
+def _iter_masscan_grepable(path: str) -> Iterator[Tuple[str, int, str, str]]:
+    """Stream open ports from a Masscan ``-oG`` report without a JSON decoder.
+    
+    Lines look like ``Timestamp: 1700000000\tHost: 10.0.0.1 ()\tPorts: 80/open/tcp//http//``.
+    """
+    with open(path, 'rb') as f:
+        for raw in f:
+            if raw.startswith(b'#'):
+                continue
+            ip = port_field = None
+            for field in raw.rstrip(b'\n').split(b'\t'):
+                if field.startswith(b'Host: '):
+                    ip = field[6:].split(b' ', 1)[0].decode()
+                elif field.startswith(b'Ports: '):
+                    port_field = field[7:]
+            if ip is None or port_field is None:
+                continue
+            port, status, proto = port_field.split(b'/', 3)[:3]
+            yield ip, int(port), proto.decode(), status.decode()
+
+
+class _PortColumns:
+    """Open ports held as parallel arrays instead of one dict per port.
+    
+    Addresses, protocols and statuses are stored once and referenced by
+    index, so a large Masscan run costs a few bytes per port until the
+    rows are rebuilt for the results.
+    """
+    
+    __slots__ = ('ip_ids', 'ports', 'protocol_ids', 'status_ids', 'ips', '_ip_index', '_labels', '_label_index')
+    
+    def __init__(self):
+        self.ip_ids = array('I')
+        self.ports = array('H')
+        self.protocol_ids = bytearray()
+        self.status_ids = bytearray()
+        self.ips: List[str] = []
+        self._ip_index: Dict[str, int] = {}
+        self._labels: List[Optional[str]] = []
+        self._label_index: Dict[Optional[str], int] = {}
+    
+    def _label_id(self, label: Optional[str]) -> int:
+        label_id = self._label_index.get(label)
+        if label_id is None:
+            label_id = self._label_index[label] = len(self._labels)
+            self._labels.append(label)
+        return label_id
+    
+    def add(self, ip: str, port: int, protocol: Optional[str], status: Optional[str]):
+        ip_id = self._ip_index.get(ip)
+        if ip_id is None:
+            ip_id = self._ip_index[ip] = len(self.ips)
+            self.ips.append(ip)
+        self.ip_ids.append(ip_id)
+        self.ports.append(port)
+        self.protocol_ids.append(self._label_id(protocol))
+        self.status_ids.append(self._label_id(status))
+    
+    def group_rows(self, key_per_ip: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """Rebuild port dicts, grouped by ``key_per_ip[ip_id]``."""
+        groups: Dict[str, List[Dict[str, Any]]] = {}
+        ips, labels = self.ips, self._labels
+        for ip_id, port, protocol_id, status_id in zip(self.ip_ids, self.ports, self.protocol_ids, self.status_ids):
+            groups.setdefault(key_per_ip[ip_id], []).append({
+                'ip': ips[ip_id],
+                'port': port,
+                'protocol': labels[protocol_id],
+                'status': labels[status_id]
+            })
+        return groups
+    
+    @classmethod
+    def from_rows(cls, rows: Iterator[Tuple[str, int, str, str]]) -> '_PortColumns':
+        columns = cls()
+        for row in rows:
+            columns.add(*row)
+        return columns
+
+
+# pcap files store LINKTYPE_* values, which differ from the platform DLT_*
+# constants dpkt exposes for some link types (LINKTYPE_RAW is 101, DLT_RAW is 12)
+_LINKTYPE_ETHERNET = 1
+_LINKTYPE_RAW = 101
+_LINKTYPE_LINUX_SLL = 113
+
+
+def _summarize_pcap(path: str) -> Tuple[set, Counter, int]:
+    """Count IPv4 endpoints and protocols in a classic PCAP file with dpkt.
+    
+    Only the IP header and transport ports are decoded, which is all the
+    tshark summary reports on. Addresses are collected as 32-bit ints, which
+    are smaller and cheaper to hash than dotted-quad strings.
+    
+    Raises ValueError for link types other than Ethernet, Linux cooked (SLL)
+    and raw IP.
+    """
+    unique_ips = set()
+    protocols: Counter = Counter()
+    total_packets = 0
+    
+    with open(path, 'rb') as f:
+        pcap = dpkt.pcap.Reader(f)
+        datalink = pcap.datalink()
+        if datalink == _LINKTYPE_ETHERNET:
+            link = dpkt.ethernet.Ethernet
+        elif datalink == _LINKTYPE_LINUX_SLL:
+            link = dpkt.sll.SLL
+        elif datalink in (_LINKTYPE_RAW, dpkt.pcap.DLT_RAW):
+            link = None  # tun/WireGuard captures start at the IP header
+        else:
+            raise ValueError(f"unsupported pcap link type {datalink}")
+        
+        for _, buf in pcap:
+            total_packets += 1
+            try:
+                if link:
+                    ip = link(buf).data
+                elif buf[:1] and buf[0] >> 4 == 4:
+                    ip = dpkt.ip.IP(buf)
+                else:
+                    continue  # raw IPv6
+            except (dpkt.UnpackError, IndexError):
+                continue
+            if not isinstance(ip, dpkt.ip.IP):
+                continue
+            
+            unique_ips.add(int.from_bytes(ip.src, 'big'))
+            unique_ips.add(int.from_bytes(ip.dst, 'big'))
+            
+            proto = _IP_PROTOCOLS.get(ip.p)
+            if proto is None:
+                continue
+            protocols[proto] += 1
+            
+            transport = ip.data
+            if proto == 'icmp' or isinstance(transport, bytes):
+                continue
+            app = _PORT_PROTOCOLS.get(transport.dport) or _PORT_PROTOCOLS.get(transport.sport)
+            if app:
+                protocols[app] += 1
+    
+    return unique_ips, protocols, total_packets
+
+
+def _target_networks(targets: List[str]) -> List[Tuple[Any, str]]:
+    """Expand Masscan target specs (address, CIDR or ``a-b`` range) into networks."""
+    networks = []
+    for target in targets:
+        try:
+            if '-' in target:
+                first, last = target.split('-', 1)
+                for network in ipaddress.summarize_address_range(
+                    ipaddress.ip_address(first.strip()), ipaddress.ip_address(last.strip())
+                ):
+                    networks.append((network, target))
+            else:
+                networks.append((ipaddress.ip_network(target.strip(), strict=False), target))
+        except ValueError:
+            continue
+    return networks
+
+
+def _owning_target(ip: str, networks: List[Tuple[Any, str]], targets: List[str]) -> str:
+    """Return the target spec that ``ip`` was scanned under."""
+    try:
+        address = ipaddress.ip_address(ip)
+    except ValueError:
+        return ', '.join(targets)
+    for network, target in networks:
+        if address in network:
+            return target
+    return ', '.join(targets)
+
 
 class NetworkIntelScanner:
     """Network intelligence gathering without target permissions."""
@@ -27,20 +296,34 @@ class NetworkIntelScanner:
         self.total_scanners = 0
         self.current_scanner = None
         self.scan_details = {}
+        # Set by the agent; signalled whenever progress or the active scanner changes
+        self.progress_queue: Optional[asyncio.Queue] = None
+        # Popen and the blocking pipe reads run here so fan-out scans don't stall the loop
+        self._spawn_pool = concurrent.futures.ThreadPoolExecutor(max_workers=16)
+        self._sharkd_proc = None
+        self._sharkd_id = 0
         
+    def _notify_progress(self):
+        """Tell the agent that progress or the active scanner changed."""
+        if self.progress_queue is not None:
+            self.progress_queue.put_nowait(self.progress)
+    
     async def run_command(self, cmd: List[str], timeout: int = 300) -> Dict[str, Any]:
-        """Execute a command asynchronously."""
+        """Execute a command on the spawn pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
+            process = await loop.run_in_executor(
+                self._spawn_pool,
+                lambda: subprocess.Popen(cmd, stdin=subprocess.DEVNULL, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
             )
+            try:
+                stdout, stderr = await loop.run_in_executor(
+                    self._spawn_pool, process.communicate, None, timeout
+                )
+            except subprocess.TimeoutExpired:
+                process.kill()
+                await loop.run_in_executor(self._spawn_pool, process.communicate)
+                raise asyncio.TimeoutError()
             
             return {
                 "returncode": process.returncode,
@@ -60,56 +343,103 @@ class NetworkIntelScanner:
                 "stderr": str(e)
             }
     
+    async def _bounded(self, semaphore: asyncio.Semaphore, func, *args):
+        """Await ``func(*args)`` while holding a slot of ``semaphore``."""
+        async with semaphore:
+            return await func(*args)
+    
     async def scan_nmap(self, targets: List[str], ports: str = "1-1000"):
-        """Active port scanning with Nmap."""
-        for target in targets:
-            output_file = os.path.join(self.temp_dir, f"nmap_{target.replace('.', '_').replace('/', '_')}.xml")
-            cmd = ["nmap", "-p", ports, "-sV", "-T4", "-oX", output_file, target]
+        """Active port scanning with Nmap, one concurrent process per target."""
+        semaphore = asyncio.Semaphore(self.config.get('nmap', {}).get('concurrency', 8))
+        await asyncio.gather(*[
+            self._bounded(semaphore, self._scan_nmap_one, index, target, ports)
+            for index, target in enumerate(targets)
+        ])
+    
+    async def _scan_nmap_one(self, index: int, target: str, ports: str):
+        """Run Nmap against a single target and record its hosts.
+        
+        Ports are discovered without version probing. When
+        ``nmap.service_detection`` is set, a second ``-sV`` pass probes only
+        the ports found open by the first.
+        """
+        nmap_config = self.config.get('nmap', {})
+        tuning = ["-T4"]
+        if nmap_config.get('min_rate'):
+            tuning.extend(["--min-rate", str(nmap_config['min_rate'])])
+        if nmap_config.get('max_retries') is not None:
+            tuning.extend(["--max-retries", str(nmap_config['max_retries'])])
+        
+        try:
+            hosts = await self._run_nmap(
+                ["-p", ports, *tuning], [target], os.path.join(self.temp_dir, f"nmap_{index}.xml"), target
+            )
+            if hosts is None:
+                return
             
-            try:
-                result = await self.run_command(cmd, timeout=600)
-                if result["returncode"] != 0:
-                    self.errors.append(f"Nmap scan failed for {target}: {result['stderr']}")
-                    continue
+            if nmap_config.get('service_detection'):
+                open_ports = sorted({port['port'] for _, ports_found in hosts for port in ports_found})
+                addresses = [address for address, ports_found in hosts if ports_found and address]
+                if open_ports and addresses:
+                    probed = await self._run_nmap(
+                        ["-sV", "-p", ",".join(map(str, open_ports)), *tuning],
+                        addresses,
+                        os.path.join(self.temp_dir, f"nmap_{index}_sv.xml"),
+                        target
+                    )
+                    if probed is not None:
+                        probed_addresses = {address for address, _ in probed}
+                        hosts = probed + [host for host in hosts if host[0] not in probed_addresses]
+            
+            for address, ports_found in hosts:
+                self.results.append({
+                    'scanner': 'nmap',
+                    'target': target,
+                    'details': {
+                        'address': address,
+                        'ports': ports_found,
+                        'total_open_ports': len(ports_found)
+                    }
+                })
+                    
+        except Exception as e:
+            self.errors.append(f"Nmap scan error for {target}: {str(e)}")
+    
+    async def _run_nmap(self, args: List[str], hosts: List[str], output_file: str, target: str):
+        """Run one Nmap pass and return ``(address, open_ports)`` per reported host."""
+        cmd = ["nmap", *args, "-oX", output_file, *hosts]
+        result = await self.run_command(cmd, timeout=600)
+        if result["returncode"] != 0:
+            self.errors.append(f"Nmap scan failed for {target}: {result['stderr']}")
+            return None
+        
+        found = []
+        if os.path.exists(output_file):
+            for host in _iter_nmap_hosts(output_file):
+                address_el = host.find('address')
+                address = address_el.get('addr') if address_el is not None else None
+                ports_found = []
                 
-                if os.path.exists(output_file):
-                    tree = ET.parse(output_file)
-                    root = tree.getroot()
+                for port in _open_ports(host):
+                    service = port.find('service')
+                    if service is not None:
+                        service_name = service.get('name')
+                        service_version = service.get('version')
+                    else:
+                        service_name = 'unknown'
+                        service_version = ''
                     
-                    for host in root.findall('host'):
-                        address = host.find('address').get('addr')
-                        ports_found = []
-                        
-                        for port in host.findall('.//port'):
-                            port_id = port.get('portid')
-                            protocol = port.get('protocol')
-                            state = port.find('state').get('state')
-                            
-                            service = port.find('service')
-                            service_name = service.get('name') if service is not None else 'unknown'
-                            service_version = service.get('version') if service is not None else ''
-                            
-                            if state == 'open':
-                                ports_found.append({
-                                    'port': int(port_id),
-                                    'protocol': protocol,
-                                    'service': service_name,
-                                    'version': service_version,
-                                    'state': state
-                                })
-                        
-                        self.results.append({
-                            'scanner': 'nmap',
-                            'target': target,
-                            'details': {
-                                'address': address,
-                                'ports': ports_found,
-                                'total_open_ports': len(ports_found)
-                            }
-                        })
-                        
-            except Exception as e:
-                self.errors.append(f"Nmap scan error for {target}: {str(e)}")
+                    ports_found.append({
+                        'port': int(port.get('portid')),
+                        'protocol': port.get('protocol'),
+                        'service': service_name,
+                        'version': service_version,
+                        'state': 'open'
+                    })
+                
+                found.append((address, ports_found))
+        
+        return found
     
     async def scan_arp(self, interface: str = "eth0"):
         """ARP scan to discover live hosts on local network."""
@@ -141,118 +471,238 @@ class NetworkIntelScanner:
         except Exception as e:
             self.errors.append(f"ARP scan error: {str(e)}")
     
+    async def _sharkd_request(self, method: str, params: Dict[str, Any] = None) -> Any:
+        """Send one JSON-RPC request to the sharkd daemon, starting it on first use."""
+        if self._sharkd_proc is None or self._sharkd_proc.returncode is not None:
+            self._sharkd_proc = await asyncio.create_subprocess_exec(
+                "sharkd", "-",
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=16 * 1024 * 1024  # a page of frames comes back as one line
+            )
+        
+        self._sharkd_id += 1
+        request = {"jsonrpc": "2.0", "id": self._sharkd_id, "method": method}
+        if params:
+            request["params"] = params
+        self._sharkd_proc.stdin.write(json.dumps(request).encode() + b'\n')
+        await self._sharkd_proc.stdin.drain()
+        
+        line = await self._sharkd_proc.stdout.readline()
+        if not line:
+            raise RuntimeError("sharkd exited unexpectedly")
+        response = (orjson.loads if orjson else json.loads)(line)
+        if 'error' in response:
+            raise RuntimeError(f"sharkd {method} failed: {response['error'].get('message')}")
+        return response.get('result')
+    
+    async def _close_sharkd(self):
+        """Stop the sharkd daemon if one was started."""
+        if self._sharkd_proc is not None and self._sharkd_proc.returncode is None:
+            self._sharkd_proc.stdin.close()
+            try:
+                await asyncio.wait_for(self._sharkd_proc.wait(), timeout=5)
+            except asyncio.TimeoutError:
+                self._sharkd_proc.kill()
+                await self._sharkd_proc.wait()
+        self._sharkd_proc = None
+    
+    async def _summarize_with_sharkd(self, capture_file: str, page_size: int = 5000):
+        """Count IPv4 endpoints and protocols in a capture through sharkd."""
+        await self._sharkd_request("load", {"file": capture_file})
+        
+        unique_ips = set()
+        protocols: Counter = Counter()
+        total_packets = 0
+        skip = 0
+        while True:
+            frames = await self._sharkd_request("frames", {
+                "filter": "ip",
+                "column0": "ip.src:0",
+                "column1": "ip.dst:0",
+                "column2": "frame.protocols:0",
+                "skip": skip,
+                "limit": page_size
+            })
+            if not frames:
+                break
+            for frame in frames:
+                src, dst, layers = frame['c']
+                total_packets += 1
+                unique_ips.add(src)
+                unique_ips.add(dst)
+                protocols.update(_REPORTED_PROTOCOLS.intersection(layers.split(':')))
+            if len(frames) < page_size:
+                break
+            skip += page_size
+        
+        return unique_ips, protocols, total_packets
+    
     async def scan_tshark(self, interface: str = "eth0", duration: int = 30):
         """Passive network traffic capture and analysis."""
         output_file = os.path.join(self.temp_dir, "capture.pcap")
         
-        # Capture packets
-        cmd = ["tshark", "-i", interface, "-a", f"duration:{duration}", "-w", output_file]
+        # Capture packets (classic pcap so dpkt can read it)
+        cmd = ["tshark", "-i", interface, "-a", f"duration:{duration}", "-F", "pcap", "-w", output_file]
         
         try:
             await self.run_command(cmd, timeout=duration + 10)
             
-            # Analyze captured packets
-            analyze_cmd = ["tshark", "-r", output_file, "-T", "json"]
-            result = await self.run_command(analyze_cmd, timeout=60)
-            
-            if result["returncode"] == 0:
+            summary = None
+            if dpkt is not None:
                 try:
-                    packets = json.loads(result["stdout"])
-                    
-                    # Extract unique IPs and protocols
-                    unique_ips = set()
-                    protocols = {}
+                    summary = await asyncio.to_thread(_summarize_pcap, output_file)
+                except ValueError as e:
+                    # Let tshark's own dissectors handle link types dpkt isn't set up for
+                    self.errors.append(f"dpkt cannot summarize capture on {interface}: {str(e)}")
+            if summary is not None:
+                unique_ips, protocols, total_packets = summary
+                self.results.append({
+                    'scanner': 'tshark',
+                    'details': {
+                        'unique_ips': [socket.inet_ntoa(ip.to_bytes(4, 'big')) for ip in unique_ips],
+                        'total_unique_ips': len(unique_ips),
+                        'protocols': dict(protocols),
+                        'total_packets': total_packets,
+                        'capture_duration': duration
+                    }
+                })
+                return
+            
+            if shutil.which("sharkd"):
+                unique_ips, protocols, total_packets = await self._summarize_with_sharkd(output_file)
+                self.results.append({
+                    'scanner': 'tshark',
+                    'details': {
+                        'unique_ips': list(unique_ips),
+                        'total_unique_ips': len(unique_ips),
+                        'protocols': dict(protocols),
+                        'total_packets': total_packets,
+                        'capture_duration': duration
+                    }
+                })
+                return
+            
+            # Analyze captured packets as newline-delimited EK JSON, limited to
+            # the dissectors we report on, and stream it one packet at a time
+            analyze_cmd = ["tshark", "-r", output_file, "-T", "ek", "-j", "frame ip tcp udp icmp dns http"]
+            process = await asyncio.create_subprocess_exec(
+                *analyze_cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL,
+                limit=1024 * 1024  # a single dissected packet can exceed the 64 KiB default
+            )
+            
+            loads = orjson.loads if orjson else json.loads
+            unique_ips = set()
+            protocols: Counter = Counter()
+            total_packets = 0
+            
+            async def consume():
+                nonlocal total_packets
+                async for line in process.stdout:
+                    # Skip the bulk-index header emitted before every packet
+                    if line.startswith(b'{"index"') or not line.strip():
+                        continue
+                    try:
+                        layers = loads(line).get('layers')
+                    except ValueError:
+                        continue
+                    if not layers:
+                        continue
+                    total_packets += 1
                     
-                    for packet in packets[:1000]:  # Limit to first 1000 packets
-                        layers = packet.get('_source', {}).get('layers', {})
-                        
-                        # Extract IPs
-                        if 'ip' in layers:
-                            src_ip = layers['ip'].get('ip.src')
-                            dst_ip = layers['ip'].get('ip.dst')
-                            if src_ip:
-                                unique_ips.add(src_ip)
-                            if dst_ip:
-                                unique_ips.add(dst_ip)
-                        
-                        # Count protocols
-                        for proto in ['tcp', 'udp', 'icmp', 'dns', 'http', 'https']:
-                            if proto in layers:
-                                protocols[proto] = protocols.get(proto, 0) + 1
+                    # Extract IPs
+                    ip_layer = layers.get('ip')
+                    if ip_layer:
+                        for field in ('ip_ip_src', 'ip_ip_dst'):
+                            value = ip_layer.get(field)
+                            if isinstance(value, list):
+                                unique_ips.update(value)
+                            elif value:
+                                unique_ips.add(value)
                     
-                    self.results.append({
-                        'scanner': 'tshark',
-                        'details': {
-                            'unique_ips': list(unique_ips),
-                            'total_unique_ips': len(unique_ips),
-                            'protocols': protocols,
-                            'total_packets': len(packets),
-                            'capture_duration': duration
-                        }
-                    })
-                    
-                except json.JSONDecodeError:
-                    self.errors.append("Failed to parse tshark output")
+                    # Count protocols from the frame's "eth:ethertype:ip:tcp:http" chain
+                    frame_protocols = layers.get('frame', {}).get('frame_frame_protocols', '')
+                    protocols.update(_REPORTED_PROTOCOLS.intersection(frame_protocols.split(':')))
+            
+            try:
+                await asyncio.wait_for(consume(), timeout=60)
+            except asyncio.TimeoutError:
+                process.kill()
+                self.errors.append("Tshark analysis timed out after 60 seconds")
+            await process.wait()
+            
+            if process.returncode == 0:
+                self.results.append({
+                    'scanner': 'tshark',
+                    'details': {
+                        'unique_ips': list(unique_ips),
+                        'total_unique_ips': len(unique_ips),
+                        'protocols': dict(protocols),
+                        'total_packets': total_packets,
+                        'capture_duration': duration
+                    }
+                })
                     
         except Exception as e:
             self.errors.append(f"Tshark capture error: {str(e)}")
     
     async def scan_masscan(self, targets: List[str], ports: str = "1-1000"):
-        """Ultra-fast port scanning with Masscan."""
-        for target in targets:
-            output_file = os.path.join(self.temp_dir, f"masscan_{target.replace('.', '_').replace('/', '_')}.json")
-            cmd = ["masscan", target, "-p", ports, "--rate", "1000", "-oJ", output_file]
+        """Ultra-fast port scanning with a single Masscan run across all targets."""
+        masscan_config = self.config.get('masscan', {})
+        grepable = masscan_config.get('output_format') == 'grepable'
+        rate = masscan_config.get('rate', 100000)
+        output_file = os.path.join(self.temp_dir, f"masscan.{'grep' if grepable else 'json'}")
+        cmd = ["masscan", *targets, "-p", ports, "--rate", str(rate), "-oG" if grepable else "-oJ", output_file]
+        
+        try:
+            await self.run_command(cmd, timeout=300)
             
-            try:
-                result = await self.run_command(cmd, timeout=300)
+            if os.path.exists(output_file):
+                parser = _iter_masscan_grepable if grepable else _iter_masscan_json
+                columns = await asyncio.to_thread(lambda: _PortColumns.from_rows(parser(output_file)))
+                
+                # Report open ports under the target that covers them, as one
+                # entry per target; ownership is resolved once per address
+                networks = _target_networks(targets)
+                owners = [_owning_target(ip, networks, targets) for ip in columns.ips]
+                by_target = columns.group_rows(owners)
                 
-                if os.path.exists(output_file):
-                    with open(output_file, 'r') as f:
-                        content = f.read()
-                        # Masscan outputs multiple JSON objects, parse them
-                        ports_found = []
-                        for line in content.split('\n'):
-                            if line.strip() and not line.startswith('#'):
-                                try:
-                                    data = json.loads(line.rstrip(','))
-                                    if 'ports' in data:
-                                        for port_info in data['ports']:
-                                            ports_found.append({
-                                                'ip': data.get('ip'),
-                                                'port': port_info.get('port'),
-                                                'protocol': port_info.get('proto'),
-                                                'status': port_info.get('status')
-                                            })
-                                except json.JSONDecodeError:
-                                    continue
-                        
-                        if ports_found:
-                            self.results.append({
-                                'scanner': 'masscan',
-                                'target': target,
-                                'details': {
-                                    'ports': ports_found,
-                                    'total_open_ports': len(ports_found)
-                                }
-                            })
-                            
-            except Exception as e:
-                self.errors.append(f"Masscan error for {target}: {str(e)}")
+                for target, target_ports in by_target.items():
+                    self.results.append({
+                        'scanner': 'masscan',
+                        'target': target,
+                        'details': {
+                            'ports': target_ports,
+                            'total_open_ports': len(target_ports)
+                        }
+                    })
+                    
+        except Exception as e:
+            self.errors.append(f"Masscan error for {', '.join(targets)}: {str(e)}")
     
     async def scan_dns_enum(self, domain: str):
         """DNS enumeration to discover subdomains and records."""
         record_types = ['A', 'AAAA', 'MX', 'NS', 'TXT', 'SOA']
         dns_records = {}
         
+        # One dig process answers every query; answer lines are "name ttl class type value"
+        cmd = ["dig", "+noall", "+answer"]
         for record_type in record_types:
-            cmd = ["dig", "+short", domain, record_type]
-            
-            try:
-                result = await self.run_command(cmd, timeout=10)
-                if result["returncode"] == 0 and result["stdout"].strip():
-                    dns_records[record_type] = result["stdout"].strip().split('\n')
-            except Exception:
-                continue
+            cmd.extend([domain, record_type])
+        
+        try:
+            result = await self.run_command(cmd, timeout=30)
+            if result["returncode"] == 0:
+                for line in result["stdout"].splitlines():
+                    fields = line.split(None, 4)
+                    if len(fields) == 5 and fields[3] in record_types:
+                        dns_records.setdefault(fields[3], []).append(fields[4])
+        except Exception:
+            pass
         
         if dns_records:
             self.results.append({
@@ -265,116 +715,133 @@ class NetworkIntelScanner:
             })
     
     async def scan_ping_sweep(self, network: str):
-        """Fast ping sweep to discover live hosts."""
+        """Fast ping sweep to discover live hosts, reported as nmap finds them."""
         cmd = ["nmap", "-sn", "-T4", network]
         
         try:
-            result = await self.run_command(cmd, timeout=120)
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.DEVNULL
+            )
             
             live_hosts = []
-            for line in result["stdout"].split('\n'):
-                if 'Nmap scan report for' in line:
-                    parts = line.split()
-                    if len(parts) >= 5:
-                        ip = parts[-1].strip('()')
-                        live_hosts.append(ip)
+            entry = {
+                'scanner': 'ping-sweep',
+                'network': network,
+                'details': {
+                    'live_hosts': live_hosts,
+                    'total_live_hosts': 0
+                }
+            }
             
-            if live_hosts:
-                self.results.append({
-                    'scanner': 'ping-sweep',
-                    'network': network,
-                    'details': {
-                        'live_hosts': live_hosts,
-                        'total_live_hosts': len(live_hosts)
-                    }
-                })
+            async def consume():
+                async for raw in process.stdout:
+                    match = _PING_RE.match(raw.decode('utf-8', errors='ignore'))
+                    if not match:
+                        continue
+                    if not live_hosts:
+                        self.results.append(entry)
+                    live_hosts.append(match.group(1))
+                    entry['details']['total_live_hosts'] = len(live_hosts)
+            
+            try:
+                await asyncio.wait_for(consume(), timeout=120)
+            except asyncio.TimeoutError:
+                process.kill()
+                self.errors.append("Ping sweep timed out after 120 seconds")
+            await process.wait()
                 
         except Exception as e:
             self.errors.append(f"Ping sweep error: {str(e)}")
     
     async def scan(self):
-        """Run all network intelligence scans."""
-        # Count total scanners to run
-        scanners_to_run = []
-        if 'ping_sweep' in self.config or not self.config:
-            scanners_to_run.append('ping-sweep')
-        if 'arp_scan' in self.config or not self.config:
-            scanners_to_run.append('arp-scan')
-        if 'nmap' in self.config:
-            scanners_to_run.append('nmap')
-        if 'masscan' in self.config:
-            scanners_to_run.append('masscan')
-        if 'tshark' in self.config:
-            scanners_to_run.append('tshark')
-        if 'dns_enum' in self.config:
-            scanners_to_run.append('dns-enum')
+        """Run all network intelligence scans.
         
-        self.total_scanners = len(scanners_to_run)
-        completed = 0
+        The active scanners are independent of each other and run
+        concurrently; the passive tshark capture runs once they finish so
+        it does not record their probe traffic.
+        """
+        # (name, details, coroutine factory); a None factory has nothing to scan
+        active: List[Tuple[str, Dict[str, Any], Optional[Callable[[], Awaitable[Any]]]]] = []
         
         # Ping sweep to discover hosts
         if 'ping_sweep' in self.config or not self.config:
-            self.current_scanner = 'ping-sweep'
             network = self.config.get('ping_sweep', {}).get('network', '192.168.1.0/24')
-            self.scan_details = {'scanner': 'ping-sweep', 'target': network}
-            await self.scan_ping_sweep(network)
-            completed += 1
-            self.progress = int((completed / self.total_scanners) * 100)
+            active.append(('ping-sweep', {'target': network}, functools.partial(self.scan_ping_sweep, network)))
         
         # ARP scan for local network
         if 'arp_scan' in self.config or not self.config:
-            self.current_scanner = 'arp-scan'
             interface = self.config.get('arp_scan', {}).get('interface', 'eth0')
-            self.scan_details = {'scanner': 'arp-scan', 'interface': interface}
-            await self.scan_arp(interface)
-            completed += 1
-            self.progress = int((completed / self.total_scanners) * 100)
+            active.append(('arp-scan', {'interface': interface}, functools.partial(self.scan_arp, interface)))
         
         # Nmap port scan
         if 'nmap' in self.config:
-            self.current_scanner = 'nmap'
             targets = self.config['nmap'].get('targets', ['127.0.0.1'])
             ports = self.config['nmap'].get('ports', '1-1000')
-            self.scan_details = {'scanner': 'nmap', 'targets': targets, 'ports': ports}
-            await self.scan_nmap(targets, ports)
-            completed += 1
-            self.progress = int((completed / self.total_scanners) * 100)
+            active.append(('nmap', {'targets': targets, 'ports': ports}, functools.partial(self.scan_nmap, targets, ports)))
         
         # Masscan for fast scanning
         if 'masscan' in self.config:
-            self.current_scanner = 'masscan'
             targets = self.config['masscan'].get('targets', [])
             ports = self.config['masscan'].get('ports', '1-1000')
-            if targets:
-                self.scan_details = {'scanner': 'masscan', 'targets': targets, 'ports': ports}
-                await self.scan_masscan(targets, ports)
+            active.append((
+                'masscan', {'targets': targets, 'ports': ports},
+                functools.partial(self.scan_masscan, targets, ports) if targets else None
+            ))
+        
+        # DNS enumeration
+        if 'dns_enum' in self.config:
+            domains = self.config['dns_enum'].get('domains', [])
+            active.append((
+                'dns-enum', {'domain': ', '.join(domains)},
+                lambda: asyncio.gather(*[self.scan_dns_enum(domain) for domain in domains])
+            ))
+        
+        self.total_scanners = len(active) + ('tshark' in self.config)
+        completed = 0
+        running: Dict[str, Dict[str, Any]] = {}
+        
+        def update_status():
+            self.current_scanner = ', '.join(running) or None
+            if len(running) == 1:
+                self.scan_details = next(iter(running.values()))
+            elif running:
+                self.scan_details = {'scanner': self.current_scanner, 'running': list(running.values())}
+            self._notify_progress()
+        
+        async def run_phase(name: str, details: Dict[str, Any], func: Optional[Callable[[], Awaitable[Any]]]):
+            nonlocal completed
+            if func is not None:
+                running[name] = dict(details, scanner=name)
+                update_status()
+                try:
+                    await func()
+                finally:
+                    running.pop(name, None)
             completed += 1
             self.progress = int((completed / self.total_scanners) * 100)
+            update_status()
+        
+        await asyncio.gather(*[run_phase(*phase) for phase in active])
         
         # Tshark passive monitoring
         if 'tshark' in self.config:
-            self.current_scanner = 'tshark'
             interface = self.config['tshark'].get('interface', 'eth0')
             duration = self.config['tshark'].get('duration', 30)
-            self.scan_details = {'scanner': 'tshark', 'interface': interface, 'duration': duration}
-            await self.scan_tshark(interface, duration)
-            completed += 1
-            self.progress = int((completed / self.total_scanners) * 100)
-        
-        # DNS enumeration
-        if 'dns_enum' in self.config:
-            self.current_scanner = 'dns-enum'
-            domains = self.config['dns_enum'].get('domains', [])
-            for domain in domains:
-                self.scan_details = {'scanner': 'dns-enum', 'domain': domain}
-                await self.scan_dns_enum(domain)
-            completed += 1
-            self.progress = int((completed / self.total_scanners) * 100)
+            await run_phase(
+                'tshark', {'interface': interface, 'duration': duration},
+                functools.partial(self.scan_tshark, interface, duration)
+            )
         
         self.current_scanner = None
         self.progress = 100
+        self._notify_progress()
         
         # Cleanup
+        await self._close_sharkd()
+        self._spawn_pool.shutdown(wait=False)
         if os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir, ignore_errors=True)
     
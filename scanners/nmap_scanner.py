@@ -1,17 +1,108 @@
 import asyncio
 import json
 import logging
-from typing import Dict, Any, List, Optional
-from pathlib import Path
+import re
+import sys
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, AsyncIterator, List, Optional
 from .base_scanner import BaseScanner
 
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
 logger = logging.getLogger(__name__)
 
+# Common vulnerable ports
+_CRITICAL_PORTS = (
+    21,  # FTP
+    22,  # SSH
+    23,  # Telnet
+    25,  # SMTP
+    53,  # DNS
+    80,  # HTTP
+    110, # POP3
+    135, # MS RPC
+    139, # NetBIOS
+    143, # IMAP
+    389, # LDAP
+    443, # HTTPS
+    445, # SMB
+    1433, # MS SQL
+    1521, # Oracle
+    2049, # NFS
+    3306, # MySQL
+    3389, # RDP
+    5432, # PostgreSQL
+    5900, # VNC
+    8080  # HTTP Proxy
+)
+
+# Common vulnerable services, matched as substrings (e.g. "ssl/http", "http-proxy")
+_CRITICAL_SERVICE_RE = re.compile("http|https|ssh|rdp|vnc|smtp|imap|pop3|ftp")
+
+_SEVERITY_LOW, _SEVERITY_MEDIUM, _SEVERITY_HIGH = 0, 1, 2
+_SEVERITY_NAMES = ("low", "medium", "high")
+
+# Per-port severity, indexed by port number: well-known ports are medium and
+# the critical ports above are high
+_PORT_SEVERITY = bytearray(65536)
+_PORT_SEVERITY[1:1025] = bytes([_SEVERITY_MEDIUM]) * 1024
+for _port in _CRITICAL_PORTS:
+    _PORT_SEVERITY[_port] = _SEVERITY_HIGH
+del _port
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    """Intern a repeated attribute value (service names, states) so ports share it."""
+    return sys.intern(value) if value is not None else None
+
+
+async def _aiter_nmap_xml(stream: asyncio.StreamReader, chunk_size: int = 65536) -> AsyncIterator[Any]:
+    """Stream the ``nmaprun`` root and then each ``host`` element of a report.
+    
+    XML is fed to a pull parser as it arrives on ``stream`` (nmap's stdout),
+    so parsing overlaps with the scan. Uses lxml when available and falls
+    back to the stdlib parser. Every host is cleared and detached once the
+    caller moves on, so memory stays bounded by a single host.
+    """
+    if etree is not None:
+        parser = etree.XMLPullParser(events=("start", "end"), tag=("nmaprun", "host"))
+    else:
+        parser = ET.XMLPullParser(events=("start", "end"))
+    
+    root = None
+    done = False
+    while not done:
+        chunk = await stream.read(chunk_size)
+        if chunk:
+            parser.feed(chunk)
+        else:
+            parser.close()
+            done = True
+        
+        for event, elem in parser.read_events():
+            if event == "start":
+                if root is None:
+                    root = elem
+                    yield root
+                continue
+            
+            if elem.tag != "host":
+                continue
+            
+            yield elem
+            elem.clear()
+            root.remove(elem)
+
+
 class NmapScanner(BaseScanner):
     """Nmap network scanner for port scanning and service discovery."""
     
     DEFAULT_PORTS = "1-1024"  # Default ports to scan
     DEFAULT_ARGS = ["-sV", "-sS", "-T4"]  # Default Nmap arguments
+    SCAN_TIMEOUT = 300  # Seconds, matching BaseScanner.run_command
     
     def __init__(self, targets: List[str], config: Dict[str, Any] = None):
         """Initialize the Nmap scanner.
@@ -33,13 +124,8 @@ class NmapScanner(BaseScanner):
     async def scan(self) -> bool:
         """Run the Nmap scan."""
         try:
-            # Create a temporary file for XML output
-            import tempfile
-            with tempfile.NamedTemporaryFile(suffix=".xml", delete=False) as tmp:
-                xml_file = tmp.name
-            
-            # Build the Nmap command
-            cmd = ["nmap", "-oX", xml_file]
+            # Build the Nmap command, with the XML report written to stdout
+            cmd = ["nmap", "-oX", "-"]
             
             # Add ports if specified
             if self.ports:
@@ -52,21 +138,44 @@ class NmapScanner(BaseScanner):
             # Add targets
             cmd.extend(self.targets)
             
-            # Run the command
-            result = await self.run_command(cmd)
+            # Run the command, parsing hosts as nmap reports them
+            process = await asyncio.create_subprocess_exec(
+                *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE
+            )
+            
+            try:
+                parsed, stderr = await asyncio.wait_for(
+                    asyncio.gather(
+                        self._parse_nmap_xml(process.stdout),
+                        process.stderr.read(),
+                        return_exceptions=True
+                    ),
+                    timeout=self.SCAN_TIMEOUT
+                )
+                await process.wait()
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                raise RuntimeError(f"Command timed out after {self.SCAN_TIMEOUT} seconds")
             
-            if result["returncode"] != 0:
-                error_msg = f"Nmap scan failed: {result['stderr']}"
+            if process.returncode != 0:
+                stderr_text = stderr.decode().strip() if isinstance(stderr, bytes) else str(stderr)
+                error_msg = f"Nmap scan failed: {stderr_text}"
                 logger.error(error_msg)
                 self.errors.append(error_msg)
                 return False
-                
-            # Parse the XML output
-            self.xml_output = self._parse_nmap_xml(xml_file)
-            self.results = self._process_results(self.xml_output)
             
-            # Clean up
-            Path(xml_file).unlink(missing_ok=True)
+            if isinstance(parsed, Exception):
+                error_msg = f"Error parsing Nmap XML: {str(parsed)}"
+                logger.error(error_msg)
+                self.errors.append(error_msg)
+                parsed = {}
+            
+            self.xml_output = parsed
+            self.results = self._process_results(self.xml_output)
             
             return True
             
@@ -76,25 +185,31 @@ class NmapScanner(BaseScanner):
             self.errors.append(error_msg)
             return False
     
-    def _parse_nmap_xml(self, xml_file: str) -> Dict[str, Any]:
-        """Parse Nmap XML output into a Python dictionary."""
+    async def _parse_nmap_xml(self, stream: asyncio.StreamReader) -> Dict[str, Any]:
+        """Parse streamed Nmap XML output into a Python dictionary.
+        
+        On a parse error the rest of the stream is drained, so nmap never
+        blocks on a full pipe, and the error is raised to the caller.
+        """
         try:
-            import xml.etree.ElementTree as ET
-            
-            tree = ET.parse(xml_file)
-            root = tree.getroot()
-            
             # Convert XML to dictionary
             result = {
                 "scanner": "nmap",
-                "args": root.get("args"),
-                "start": root.get("start"),
+                "args": None,
+                "start": None,
                 "hosts": []
             }
             
-            for host in root.findall("host"):
+            async for host in _aiter_nmap_xml(stream):
+                if host.tag == "nmaprun":
+                    # Scan metadata lives on the root element
+                    result["args"] = host.get("args")
+                    result["start"] = host.get("start")
+                    continue
+                
+                status = host.find("status")
                 host_data = {
-                    "status": host.find("status").get("state") if host.find("status") is not None else "unknown",
+                    "status": status.get("state") if status is not None else "unknown",
                     "addresses": [],
                     "hostnames": [],
                     "ports": []
@@ -116,20 +231,21 @@ class NmapScanner(BaseScanner):
                 
                 # Get ports
                 for port in host.findall("ports/port"):
+                    state = port.find("state")
                     port_data = {
                         "port": int(port.get("portid")),
-                        "protocol": port.get("protocol"),
-                        "state": port.find("state").get("state") if port.find("state") is not None else "unknown",
+                        "protocol": _intern(port.get("protocol")),
+                        "state": _intern(state.get("state")) if state is not None else "unknown",
                         "service": {}
                     }
                     
                     service = port.find("service")
                     if service is not None:
                         port_data["service"] = {
-                            "name": service.get("name"),
-                            "product": service.get("product", ""),
-                            "version": service.get("version", ""),
-                            "extrainfo": service.get("extrainfo", "")
+                            "name": _intern(service.get("name")),
+                            "product": _intern(service.get("product", "")),
+                            "version": _intern(service.get("version", "")),
+                            "extrainfo": _intern(service.get("extrainfo", ""))
                         }
                     
                     host_data["ports"].append(port_data)
@@ -138,11 +254,10 @@ class NmapScanner(BaseScanner):
             
             return result
             
-        except Exception as e:
-            error_msg = f"Error parsing Nmap XML: {str(e)}"
-            logger.error(error_msg, exc_info=True)
-            self.errors.append(error_msg)
-            return {}
+        except Exception:
+            while await stream.read(65536):
+                pass
+            raise
     
     def _process_results(self, nmap_data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Process Nmap results into a standardized format."""
@@ -177,41 +292,11 @@ class NmapScanner(BaseScanner):
         port = port_data.get("port", 0)
         service = port_data.get("service", {}).get("name", "").lower()
         
-        # Common vulnerable services
-        critical_services = {"http", "https", "ssh", "rdp", "vnc", "smtp", "imap", "pop3", "ftp"}
+        if (port == 80 or port == 443) and "http" in service:
+            return "medium"  # Common web services are typically expected
         
-        # Common vulnerable ports
-        critical_ports = {
-            21,  # FTP
-            22,  # SSH
-            23,  # Telnet
-            25,  # SMTP
-            53,  # DNS
-            80,  # HTTP
-            110, # POP3
-            135, # MS RPC
-            139, # NetBIOS
-            143, # IMAP
-            389, # LDAP
-            443, # HTTPS
-            445, # SMB
-            1433, # MS SQL
-            1521, # Oracle
-            2049, # NFS
-            3306, # MySQL
-            3389, # RDP
-            5432, # PostgreSQL
-            5900, # VNC
-            8080  # HTTP Proxy
-        }
+        severity = _PORT_SEVERITY[port] if 0 <= port < 65536 else _SEVERITY_LOW
+        if severity != _SEVERITY_HIGH and _CRITICAL_SERVICE_RE.search(service):
+            severity = _SEVERITY_HIGH
         
-        if port in {80, 443} and "http" in service:
-            return "medium"  # Common web services are typically expected
-            
-        if port in critical_ports or any(svc in service for svc in critical_services):
-            return "high"
-            
-        if 1 <= port <= 1024:  # Well-known ports
-            return "medium"
-            
-        return "low"
+        return _SEVERITY_NAMES[severity]
@@ -0,0 +1,68 @@
+"""
+On-disk cache of scan results keyed by a hash of what was scanned and how,
+so scheduled re-scans of an unchanged system can skip slow external tools.
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _dumps(obj: Any, sort_keys: bool = False) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS if sort_keys else 0)
+    return json.dumps(obj, sort_keys=sort_keys, separators=(',', ':')).encode()
+
+
+def _loads(data: bytes) -> Any:
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+
+class ResultCache:
+    """Stores the last results for a cache key as one JSON file per key."""
+
+    def __init__(self, cache_dir: str = "~/.cache/ai_defend"):
+        self.cache_dir = os.path.expanduser(cache_dir)
+
+    @staticmethod
+    def make_key(**parts: Any) -> str:
+        """Hash the given parts (scanner name, config, host, ...) into a cache key."""
+        return hashlib.sha256(_dumps(parts, sort_keys=True)).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached results for ``key``, or None if missing or expired."""
+        try:
+            with open(self._path(key), 'rb') as f:
+                entry = _loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+        if entry.get('expires_at', 0) < time.time():
+            return None
+        return entry.get('results')
+
+    def put(self, key: str, results: List[Dict[str, Any]], ttl: int = 86400) -> None:
+        """Store ``results`` under ``key`` for ``ttl`` seconds."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        data = _dumps({'expires_at': time.time() + ttl, 'results': results})
+
+        # Write then rename so a concurrent reader never sees a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, self._path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
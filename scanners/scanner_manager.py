@@ -1,31 +1,50 @@
 import asyncio
+import importlib
+import itertools
 import json
 import logging
+import os
 from datetime import datetime
-from typing import Dict, List, Any, Optional, Type, TypeVar, Union
+from typing import Awaitable, BinaryIO, Callable, Dict, Iterable, List, Any, Optional, Tuple, Type, TypeVar, Union
 
 from .base_scanner import BaseScanner
-from .nmap_scanner import NmapScanner
-from .lynis_scanner import LynisScanner
-from .file_integrity_monitor import FileIntegrityMonitor
-from .linux.security_scanner import SecurityScanner
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 logger = logging.getLogger(__name__)
 
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize to compact JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, separators=(',', ':')).encode()
+
 # Create a type variable for the scanner classes
 ScannerType = TypeVar('ScannerType', bound=BaseScanner)
 
+# Scanner name -> (module relative to this package, class name, config -> constructor kwargs).
+# Modules are imported only when their scanner is enabled.
+SCANNER_FACTORIES: Dict[str, Tuple[str, str, Callable[[Dict[str, Any]], Dict[str, Any]]]] = {
+    "nmap": (".nmap_scanner", "NmapScanner",
+             lambda cfg: dict(targets=cfg.get("targets", ["localhost"]), config=cfg)),
+    "lynis": (".lynis_scanner", "LynisScanner",
+              lambda cfg: dict(config=cfg)),
+    "file_integrity": (".file_integrity_monitor", "FileIntegrityMonitor",
+                       lambda cfg: dict(baseline_file=cfg.get("baseline_file"), config=cfg)),
+    "security": (".linux.security_scanner", "SecurityScanner",  # Comprehensive security scanner
+                 lambda cfg: dict(config=cfg)),
+}
+
+# Run when the config has no "scanners" list; "security" must be requested explicitly
+DEFAULT_SCANNERS = ("nmap", "lynis", "file_integrity")
+
 class ScannerManager:
     """Manages multiple security scanners and coordinates their execution."""
     
-    # Map of scanner types to their classes
-    SCANNER_CLASSES = {
-        "nmap": NmapScanner,
-        "lynis": LynisScanner,
-        "file_integrity": FileIntegrityMonitor,
-        "security": SecurityScanner  # Add the comprehensive security scanner
-    }
-    
     def __init__(self, config: Dict[str, Any] = None):
         """Initialize the scanner manager.
         
@@ -52,38 +71,27 @@ class ScannerManager:
         self.scan_id = f"scan_{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
         self.results: List[Dict[str, Any]] = []
         self.errors: List[str] = []
+        # Findings streamed from the running scanners; set for the duration of run_scan
+        self._result_queue: Optional[asyncio.Queue] = None
         
         # Initialize scanners based on config
         self._initialize_scanners()
     
     def _initialize_scanners(self) -> None:
         """Initialize scanners based on the configuration."""
-        scanners_to_enable = self.config.get("scanners", list(self.SCANNER_CLASSES.keys()))
+        scanners_to_enable = self.config.get("scanners", DEFAULT_SCANNERS)
         
         for scanner_name in scanners_to_enable:
-            if scanner_name not in self.SCANNER_CLASSES:
+            if scanner_name not in SCANNER_FACTORIES:
                 logger.warning(f"Unknown scanner: {scanner_name}")
                 continue
                 
             scanner_config = self.config.get(scanner_name, {})
+            module_name, class_name, build_kwargs = SCANNER_FACTORIES[scanner_name]
             
             try:
-                if scanner_name == "nmap":
-                    targets = scanner_config.get("targets", ["localhost"])
-                    self.scanners[scanner_name] = NmapScanner(
-                        targets=targets,
-                        config=scanner_config
-                    )
-                elif scanner_name == "lynis":
-                    self.scanners[scanner_name] = LynisScanner(
-                        config=scanner_config
-                    )
-                elif scanner_name == "file_integrity":
-                    baseline_file = scanner_config.get("baseline_file")
-                    self.scanners[scanner_name] = FileIntegrityMonitor(
-                        baseline_file=baseline_file,
-                        config=scanner_config
-                    )
+                scanner_class = getattr(importlib.import_module(module_name, __package__), class_name)
+                self.scanners[scanner_name] = scanner_class(**build_kwargs(scanner_config))
                 
                 logger.info(f"Initialized scanner: {scanner_name}")
                 
@@ -92,16 +100,38 @@ class ScannerManager:
                 logger.error(error_msg, exc_info=True)
                 self.errors.append(error_msg)
     
-    async def run_scan(self, scanner_name: Optional[str] = None) -> bool:
+    async def run_scan(
+        self,
+        scanner_name: Optional[str] = None,
+        on_scanner_done: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]] = None,
+        ndjson_file: Optional[str] = None
+    ) -> bool:
         """Run one or all scanners.
         
+        Findings are streamed from the scanners through a shared queue and
+        collected into ``self.results`` as they are recorded, not when the
+        scanner finishes.
+        
         Args:
             scanner_name: Name of the scanner to run. If None, run all scanners.
+            on_scanner_done: Optional coroutine called with each scanner's outcome
+                (as returned by _run_single_scanner) as soon as that scanner finishes.
+            on_result: Optional coroutine called with each finding as soon as it
+                is collected.
+            ndjson_file: Optional path; when given, each finding is appended to it
+                as an NDJSON line as soon as it is collected (see save_results_ndjson).
             
         Returns:
             bool: True if all scans completed successfully, False otherwise.
         """
         success = True
+        error_count = len(self.errors)
+        ndjson = None
+        if ndjson_file:
+            ndjson = await asyncio.to_thread(self._open_ndjson, ndjson_file)
+        self._result_queue = asyncio.Queue()
+        consumer = asyncio.create_task(self._consume_results(self._result_queue, on_result, ndjson))
         
         try:
             if scanner_name:
@@ -111,14 +141,9 @@ class ScannerManager:
                     self.errors.append(error_msg)
                     return False
                     
-                scanner = self.scanners[scanner_name]
                 logger.info(f"Running scanner: {scanner_name}")
-                
-                if await scanner.scan():
-                    self.results.extend(scanner.get_results())
-                else:
-                    self.errors.extend(scanner.get_errors())
-                    success = False
+                result = await self._run_single_scanner(scanner_name, self.scanners[scanner_name])
+                success = result["success"]
             else:
                 # Run all scanners concurrently
                 tasks = []
@@ -126,17 +151,20 @@ class ScannerManager:
                     logger.info(f"Queueing scanner: {name}")
                     tasks.append(self._run_single_scanner(name, scanner))
                 
-                # Wait for all scanners to complete
-                results = await asyncio.gather(*tasks, return_exceptions=True)
-                
-                # Process results
-                for result in results:
-                    if isinstance(result, Exception):
-                        logger.error(f"Scanner error: {str(result)}", exc_info=result)
-                        self.errors.append(str(result))
+                # Handle each scanner as it finishes instead of waiting for the slowest
+                for fut in asyncio.as_completed(tasks):
+                    try:
+                        result = await fut
+                    except Exception as e:
+                        logger.error(f"Scanner error: {str(e)}", exc_info=e)
+                        self.errors.append(str(e))
                         success = False
-                    elif not result.get("success", False):
+                        continue
+                    
+                    if not result.get("success", False):
                         success = False
+                    if on_scanner_done is not None:
+                        await on_scanner_done(result)
             
             return success
             
@@ -145,15 +173,56 @@ class ScannerManager:
             logger.error(error_msg, exc_info=True)
             self.errors.append(error_msg)
             return False
+        
+        finally:
+            # Let the consumer collect everything still queued before stopping it
+            if not consumer.done():
+                await self._result_queue.join()
+            consumer.cancel()
+            self._result_queue = None
+            if ndjson is not None:
+                await asyncio.to_thread(self._close_ndjson, ndjson, self.errors[error_count:])
+    
+    async def _consume_results(
+        self,
+        queue: asyncio.Queue,
+        on_result: Optional[Callable[[Dict[str, Any]], Awaitable[None]]],
+        ndjson: Optional[BinaryIO] = None
+    ) -> None:
+        """Collect findings from the shared queue as the scanners record them.
+        
+        Everything queued since the last wake-up is handled as one batch, so
+        the NDJSON file gets a single off-loop write per batch.
+        """
+        while True:
+            batch = [await queue.get()]
+            while not queue.empty():
+                batch.append(queue.get_nowait())
+            try:
+                self.results.extend(batch)
+                if ndjson is not None:
+                    # Serialize here, while the findings can't change under us
+                    data = b''.join(_dumps(result) + b'\n' for result in batch)
+                    await asyncio.to_thread(ndjson.write, data)
+                if on_result is not None:
+                    for result in batch:
+                        try:
+                            await on_result(result)
+                        except Exception as e:
+                            logger.error(f"Error handling result: {str(e)}", exc_info=True)
+            except Exception as e:
+                logger.error(f"Error handling results: {str(e)}", exc_info=True)
+            finally:
+                for _ in batch:
+                    queue.task_done()
     
     async def _run_single_scanner(self, name: str, scanner: BaseScanner) -> Dict[str, Any]:
-        """Run a single scanner and return its results."""
+        """Run a single scanner, streaming its findings to the result queue."""
+        scanner.attach_result_queue(self._result_queue)
         try:
             success = await scanner.scan()
             
-            if success:
-                self.results.extend(scanner.get_results())
-            else:
+            if not success:
                 self.errors.extend(scanner.get_errors())
             
             return {
@@ -172,6 +241,10 @@ class ScannerManager:
                 "success": False,
                 "error": str(e)
             }
+        
+        finally:
+            # Also picks up results the scanner assigned in bulk rather than via add_result
+            scanner.detach_result_queue()
     
     def get_results(self) -> List[Dict[str, Any]]:
         """Get all scan results."""
@@ -181,33 +254,113 @@ class ScannerManager:
         """Get all errors from all scanners."""
         return self.errors
     
-    def save_results(self, output_file: str = None) -> str:
+    async def save_results(self, output_file: str = None) -> str:
         """Save all results to a JSON file.
         
+        The file is written on a worker thread so a large result set does not
+        stall the event loop.
+        
         Args:
             output_file: Path to the output file. If None, a default name is used.
             
         Returns:
             str: Path to the output file.
         """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._save_results_sync, output_file, len(self.results), len(self.errors)
+        )
+    
+    def _default_output_file(self, extension: str) -> str:
+        output_dir = "scan_results"
+        os.makedirs(output_dir, exist_ok=True)
+        return os.path.join(output_dir, f"scan_{self.scan_id}.{extension}")
+    
+    def _save_results_sync(self, output_file: Optional[str], result_count: int, error_count: int) -> str:
+        """Write the first ``result_count`` results and ``error_count`` errors; runs off the event loop.
+        
+        Results are encoded and written one at a time (with orjson when
+        available), so peak memory stays at a single result rather than a
+        serialized copy of the whole scan. The lists are only ever appended
+        to, so they are read in place up to the counts taken when saving began.
+        """
         if not output_file:
-            output_dir = "scan_results"
-            os.makedirs(output_dir, exist_ok=True)
-            output_file = os.path.join(output_dir, f"scan_{self.scan_id}.json")
+            output_file = self._default_output_file("json")
         
-        result_data = {
-            "scan_id": self.scan_id,
-            "timestamp": datetime.utcnow().isoformat(),
-            "scanners_run": list(self.scanners.keys()),
-            "results": self.results,
-            "errors": self.errors
-        }
+        with open(output_file, 'wb', buffering=1 << 20) as f:
+            f.write(b'{"scan_id":')
+            f.write(_dumps(self.scan_id))
+            f.write(b',"timestamp":')
+            f.write(_dumps(datetime.utcnow().isoformat()))
+            f.write(b',"scanners_run":')
+            f.write(_dumps(list(self.scanners.keys())))
+            f.write(b',"results":[')
+            for i, result in enumerate(itertools.islice(self.results, result_count)):
+                if i:
+                    f.write(b',')
+                f.write(_dumps(result))
+            f.write(b'],"errors":')
+            f.write(_dumps(self.errors[:error_count]))
+            f.write(b'}')
+        
+        return output_file
+    
+    async def save_results_ndjson(self, output_file: str = None) -> str:
+        """Save all results as newline-delimited JSON, one finding per line.
         
-        with open(output_file, 'w') as f:
-            json.dump(result_data, f, indent=2)
+        The first line is a header with the scan id, timestamp and scanners run,
+        followed by one line per result and one ``{"error": ...}`` line per error.
+        
+        Args:
+            output_file: Path to the output file. If None, a default name is used.
+            
+        Returns:
+            str: Path to the output file.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            None, self._save_ndjson_sync, output_file, len(self.results), len(self.errors)
+        )
+    
+    def _save_ndjson_sync(self, output_file: Optional[str], result_count: int, error_count: int) -> str:
+        """Write the NDJSON form of the results; runs off the event loop."""
+        if not output_file:
+            output_file = self._default_output_file("ndjson")
+        
+        with open(output_file, 'wb', buffering=1 << 20) as f:
+            f.write(self._ndjson_header())
+            for result in itertools.islice(self.results, result_count):
+                f.write(_dumps(result) + b'\n')
+            self._write_ndjson_errors(f, itertools.islice(self.errors, error_count))
         
         return output_file
     
+    def _open_ndjson(self, output_file: str) -> BinaryIO:
+        """Open the incremental NDJSON file and write its header; runs off the event loop."""
+        f = open(output_file, 'wb', buffering=1 << 16)
+        f.write(self._ndjson_header())
+        return f
+    
+    @classmethod
+    def _close_ndjson(cls, f: BinaryIO, errors: List[str]) -> None:
+        """Append the error lines and close the NDJSON file; runs off the event loop."""
+        try:
+            cls._write_ndjson_errors(f, errors)
+        finally:
+            f.close()
+    
+    def _ndjson_header(self) -> bytes:
+        return _dumps({
+            "scan_id": self.scan_id,
+            "timestamp": datetime.utcnow().isoformat(),
+            "scanners_run": list(self.scanners.keys())
+        }) + b'\n'
+    
+    @staticmethod
+    def _write_ndjson_errors(f: BinaryIO, errors: Iterable[str]) -> None:
+        for error in errors:
+            f.write(_dumps({"error": error}) + b'\n')
+    
     def get_scanner(self, scanner_name: str) -> Optional[BaseScanner]:
         """Get a scanner instance by name."""
         return self.scanners.get(scanner_name)
@@ -248,7 +401,7 @@ async def example_usage():
     success = await manager.run_scan()
     
     # Save results
-    output_file = manager.save_results()
+    output_file = await manager.save_results()
     print(f"Scan complete. Results saved to: {output_file}")
     
     # Print summary
@@ -4,57 +4,169 @@ Includes: Lynis, chkrootkit, and rkhunter
 """
 
 import asyncio
+import collections
 import subprocess
 import json
 import os
+import re
+import signal
+import socket
 import tempfile
 import shutil
 from datetime import datetime
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional
+
+try:
+    from scanners.result_cache import ResultCache
+except ImportError:
+    from result_cache import ResultCache  # type: ignore[no-redef]
+
+# Bump when result parsing changes so stale cached results are not reused
+RESULT_VERSION = 1
 
 
 class SecurityAuditScanner:
     """System security audit scanner."""
     
+    TOOLS = ('lynis', 'chkrootkit', 'rkhunter')
+    # Options that control caching itself and so must not change the cache key
+    CACHE_OPTIONS = ('cache_ttl', 'cache_dir', 'force_reindex')
+    # Only these tools run over SSH; the rest always scan the local machine
+    REMOTE_TOOLS = ('lynis',)
+    REMOTE_OPTIONS = ('remote_host', 'remote_key')
+    # Rootkit checkers inspect live system state that the cache key cannot
+    # fingerprint, so a cached "clean" could hide a new infection; they always run
+    CACHEABLE_TOOLS = ('lynis',)
+    
+    # Matched against each raw output line as the tool prints it;
+    # only the captured text is decoded
+    _LYNIS_RE = re.compile(rb'(?m)^(.*?)(Warning:|Suggestion:|Hardening index)(.*)$')
+    _CHKROOTKIT_RE = re.compile(rb'(?mi)^[^\S\n]*((?=\S).*(?:infected|warning).*?)[^\S\n]*$')
+    _RKHUNTER_RE = re.compile(rb'(?mi)^[^\S\n]*((?=\S).*warning.*?)[^\S\n]*$')
+    
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         self.results = []
         self.errors = []
-        self.temp_dir = tempfile.mkdtemp(prefix="security_audit_")
+        self.temp_dir: Optional[str] = None  # Created on first use by _ensure_temp_dir
         self.remote_host = config.get('remote_host')  # SSH target: user@host
         self.remote_key = config.get('remote_key')    # SSH key path
+        self.progress = 0
+        self.total_scanners = 0
+        self.current_scanner = None
+        self.scan_details = {}
+        # Set by the agent; signalled whenever progress or the active scanner changes
+        self.progress_queue: Optional[asyncio.Queue] = None
+        # Opt-in: reuse lynis' last results for an unchanged config/host for cache_ttl seconds
+        self.cache_ttl = int(self.config.get('cache_ttl', 0))
+        self.force_reindex = bool(self.config.get('force_reindex', False))
+        self.cache = ResultCache(self.config.get('cache_dir', '~/.cache/ai_defend'))
+    
+    def _cache_key(self, name: str) -> str:
+        remote = bool(self.remote_host) and name in self.REMOTE_TOOLS
+        ignored = self.CACHE_OPTIONS if remote else self.CACHE_OPTIONS + self.REMOTE_OPTIONS
+        return ResultCache.make_key(
+            scanner=name,
+            cfg={k: v for k, v in self.config.items() if k not in ignored},
+            host=self.remote_host if remote else socket.gethostname(),
+            version=RESULT_VERSION
+        )
     
-    async def run_command(self, cmd: List[str], timeout: int = 600) -> Dict[str, Any]:
-        """Execute a command asynchronously."""
+    def _notify_progress(self):
+        """Tell the agent that progress or the active scanner changed."""
+        if self.progress_queue is not None:
+            self.progress_queue.put_nowait(self.progress)
+    
+    async def run_command(
+        self,
+        cmd: List[str],
+        timeout: int = 600,
+        on_line: Optional[Callable[[bytes], None]] = None
+    ) -> Dict[str, Any]:
+        """Execute a command asynchronously, returning raw stdout/stderr bytes.
+        
+        With ``on_line``, stdout is not buffered: each line is handed to
+        ``on_line`` as the tool prints it and ``stdout`` comes back empty,
+        while only the tail of stderr is kept.
+        
+        The command runs in its own session so that if it does not finish
+        normally (timeout, an over-long output line, cancellation) the whole
+        process group (e.g. rkhunter's helpers) is killed and reaped.
+        """
+        process = None
         try:
             process = await asyncio.create_subprocess_exec(
                 *cmd,
+                stdin=asyncio.subprocess.DEVNULL,
                 stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
+                stderr=asyncio.subprocess.PIPE,
+                start_new_session=True,
+                limit=1 << 20
             )
             
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=timeout
-            )
+            if on_line is None:
+                stdout, stderr = await asyncio.wait_for(
+                    process.communicate(),
+                    timeout=timeout
+                )
+            else:
+                stdout = b""
+                stderr = await asyncio.wait_for(
+                    self._stream_output(process, on_line),
+                    timeout=timeout
+                )
             
             return {
                 "returncode": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='ignore'),
-                "stderr": stderr.decode('utf-8', errors='ignore')
+                "stdout": stdout,
+                "stderr": stderr
             }
         except asyncio.TimeoutError:
             return {
                 "returncode": -1,
-                "stdout": "",
-                "stderr": f"Command timed out after {timeout} seconds"
+                "stdout": b"",
+                "stderr": f"Command timed out after {timeout} seconds".encode()
             }
         except Exception as e:
             return {
                 "returncode": -1,
-                "stdout": "",
-                "stderr": str(e)
+                "stdout": b"",
+                "stderr": str(e).encode()
             }
+        finally:
+            if process is not None and process.returncode is None:
+                await self._kill_process_group(process)
+    
+    @staticmethod
+    async def _stream_output(process: asyncio.subprocess.Process, on_line: Callable[[bytes], None]) -> bytes:
+        """Feed stdout lines to ``on_line`` until EOF; return the last lines of stderr."""
+        stderr_tail: collections.deque = collections.deque(maxlen=50)
+        
+        async def read_stderr():
+            async for line in process.stderr:
+                stderr_tail.append(line)
+        
+        stderr_task = asyncio.create_task(read_stderr())
+        try:
+            async for line in process.stdout:
+                on_line(line)
+            await stderr_task
+        finally:
+            stderr_task.cancel()
+        await process.wait()
+        return b"".join(stderr_tail)
+    
+    @staticmethod
+    async def _kill_process_group(process: asyncio.subprocess.Process):
+        """Kill a timed-out command and its children, then reap it."""
+        try:
+            os.killpg(process.pid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        try:
+            await asyncio.wait_for(process.wait(), timeout=5)
+        except asyncio.TimeoutError:
+            pass
     
     async def scan_lynis(self):
         """Run Lynis security audit (local or remote)."""
@@ -69,21 +181,26 @@ class SecurityAuditScanner:
             cmd = ["lynis", "audit", "system", "--quick", "--quiet"]
         
         try:
-            result = await self.run_command(cmd, timeout=900)
-            
             warnings = []
             suggestions = []
             hardening_index = None
             
-            for line in result["stdout"].split('\n'):
-                if 'Warning:' in line:
-                    warnings.append(line.replace('Warning:', '').strip())
-                elif 'Suggestion:' in line:
-                    suggestions.append(line.replace('Suggestion:', '').strip())
-                elif 'Hardening index' in line:
-                    parts = line.split(':')
+            def parse_line(line: bytes):
+                nonlocal hardening_index
+                match = self._LYNIS_RE.search(line)
+                if match is None:
+                    return
+                prefix, kind, rest = match.groups()
+                if kind == b'Warning:':
+                    warnings.append((prefix + rest.replace(kind, b'')).strip().decode('utf-8', errors='ignore'))
+                elif kind == b'Suggestion:':
+                    suggestions.append((prefix + rest.replace(kind, b'')).strip().decode('utf-8', errors='ignore'))
+                else:
+                    parts = match.group(0).split(b':')
                     if len(parts) > 1:
-                        hardening_index = parts[1].strip()
+                        hardening_index = parts[1].strip().decode('utf-8', errors='ignore')
+            
+            result = await self.run_command(cmd, timeout=900, on_line=parse_line)
             
             self.results.append({
                 'scanner': 'lynis',
@@ -92,7 +209,8 @@ class SecurityAuditScanner:
                     'suggestions': suggestions[:10],  # First 10 suggestions
                     'hardening_index': hardening_index,
                     'total_warnings': len(warnings),
-                    'total_suggestions': len(suggestions)
+                    'total_suggestions': len(suggestions),
+                    'scan_complete': result["returncode"] == 0
                 }
             })
             
@@ -104,21 +222,19 @@ class SecurityAuditScanner:
         cmd = ["chkrootkit", "-q"]  # Quiet mode, only show problems
         
         try:
-            result = await self.run_command(cmd, timeout=600)
-            
             findings = []
-            for line in result["stdout"].split('\n'):
-                line = line.strip()
-                if line and 'INFECTED' in line.upper():
-                    findings.append({
-                        'type': 'infected',
-                        'details': line
-                    })
-                elif line and 'WARNING' in line.upper():
-                    findings.append({
-                        'type': 'warning',
-                        'details': line
-                    })
+            
+            def parse_line(line: bytes):
+                match = self._CHKROOTKIT_RE.search(line)
+                if match is None:
+                    return
+                finding = match.group(1)
+                findings.append({
+                    'type': 'infected' if b'INFECTED' in finding.upper() else 'warning',
+                    'details': finding.decode('utf-8', errors='ignore')
+                })
+            
+            result = await self.run_command(cmd, timeout=600, on_line=parse_line)
             
             self.results.append({
                 'scanner': 'chkrootkit',
@@ -142,43 +258,115 @@ class SecurityAuditScanner:
         cmd = ["rkhunter", "--check", "--skip-keypress", "--report-warnings-only"]
         
         try:
-            result = await self.run_command(cmd, timeout=900)
-            
             warnings = []
-            for line in result["stdout"].split('\n'):
-                line = line.strip()
-                if line and ('Warning:' in line or 'warning' in line.lower()):
-                    warnings.append(line)
+            
+            def parse_line(line: bytes):
+                match = self._RKHUNTER_RE.search(line)
+                if match is not None:
+                    warnings.append(match.group(1).decode('utf-8', errors='ignore'))
+            
+            result = await self.run_command(cmd, timeout=900, on_line=parse_line)
             
             self.results.append({
                 'scanner': 'rkhunter',
                 'details': {
                     'warnings': warnings,
                     'total_warnings': len(warnings),
-                    'scan_complete': True
+                    # rkhunter exits 1 when it reports warnings; -1 means missing or timed out
+                    'scan_complete': result["returncode"] in (0, 1)
                 }
             })
             
         except Exception as e:
             self.errors.append(f"rkhunter scan error: {str(e)}")
     
+    async def _run_cached(self, name: str, scan_func):
+        """Run one tool, or reuse its results from the cache when still fresh."""
+        if self.cache_ttl <= 0 or name not in self.CACHEABLE_TOOLS:
+            await scan_func()
+            return
+        
+        key = self._cache_key(name)
+        if not self.force_reindex:
+            cached = await asyncio.to_thread(self.cache.get, key)
+            if cached is not None:
+                self.results.extend(dict(result, cached=True) for result in cached)
+                return
+        
+        await scan_func()
+        fresh = [result for result in self.results if result['scanner'] == name]
+        # Failed runs (tool missing, timeout) are retried next time rather than cached
+        if fresh and all(result['details'].get('scan_complete') for result in fresh):
+            try:
+                await asyncio.to_thread(self.cache.put, key, fresh, self.cache_ttl)
+            except OSError as e:
+                self.errors.append(f"{name} cache write error: {str(e)}")
+    
     async def scan(self):
         """Run all security audit scans."""
-        # Run Lynis if configured
-        if 'lynis' in self.config or not self.config:
-            await self.scan_lynis()
+        # Options such as remote_host or cache_ttl don't count as selecting a tool
+        run_all = not any(tool in self.config for tool in self.TOOLS)
+        scanners_to_run = []
+        if 'lynis' in self.config or run_all:
+            scanners_to_run.append(('lynis', self.scan_lynis))
+        if 'chkrootkit' in self.config or run_all:
+            scanners_to_run.append(('chkrootkit', self.scan_chkrootkit))
+        if 'rkhunter' in self.config or run_all:
+            scanners_to_run.append(('rkhunter', self.scan_rkhunter))
+        
+        self.total_scanners = len(scanners_to_run)
+        running = [name for name, _ in scanners_to_run]
+        completed = 0
+        
+        def update_running():
+            self.current_scanner = ', '.join(running) or None
+            self.scan_details = {'scanner': self.current_scanner, 'target': self.remote_host or 'localhost'}
+        
+        async def run_one(name, scan_func):
+            nonlocal completed
+            try:
+                await self._run_cached(name, scan_func)
+            finally:
+                running.remove(name)
+                completed += 1
+                self.progress = int((completed / self.total_scanners) * 100)
+                update_running()
+                self._notify_progress()
         
-        # Run chkrootkit if configured
-        if 'chkrootkit' in self.config or not self.config:
-            await self.scan_chkrootkit()
+        # The tools are independent, so total time is the slowest one rather than the sum
+        update_running()
+        self._notify_progress()
+        outcomes = await asyncio.gather(
+            *(run_one(name, scan_func) for name, scan_func in scanners_to_run),
+            return_exceptions=True
+        )
+        for (name, _), outcome in zip(scanners_to_run, outcomes):
+            if isinstance(outcome, Exception):
+                self.errors.append(f"{name} scan error: {str(outcome)}")
         
-        # Run rkhunter if configured
-        if 'rkhunter' in self.config or not self.config:
-            await self.scan_rkhunter()
+        self.current_scanner = None
+        self.progress = 100
+        self._notify_progress()
         
-        # Cleanup
-        if os.path.exists(self.temp_dir):
+        self.cleanup()
+    
+    def _ensure_temp_dir(self) -> str:
+        """Return the scratch directory, creating it on first use."""
+        if self.temp_dir is None:
+            self.temp_dir = tempfile.mkdtemp(prefix="security_audit_")
+        return self.temp_dir
+    
+    def cleanup(self):
+        """Remove the scratch directory if one was created."""
+        if self.temp_dir and os.path.exists(self.temp_dir):
             shutil.rmtree(self.temp_dir, ignore_errors=True)
+        self.temp_dir = None
+    
+    async def __aenter__(self):
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        self.cleanup()
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert scan results to dictionary."""
@@ -194,8 +382,8 @@ async def main():
     """Test the security audit scanner."""
     config = {}
     
-    scanner = SecurityAuditScanner(config)
-    await scanner.scan()
+    async with SecurityAuditScanner(config) as scanner:
+        await scanner.scan()
     print(json.dumps(scanner.to_dict(), indent=2))
 
 
@@ -4,13 +4,31 @@ Specialized Agent Client - Supports network, malware, and security audit agents
 
 import asyncio
 import httpx
+import itertools
 import socket
 import json
 import os
 import sys
-from datetime import datetime
+import time
 from typing import Dict, Any, List, Optional
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx; installed with httpx[http2])
+except ImportError:
+    h2 = None
+
+
+def _dumps(obj: Any) -> bytes:
+    """Serialize a request body to JSON bytes, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode()
+
 
 class SpecializedAgent:
     """Agent client for specialized scanners."""
@@ -25,8 +43,33 @@ class SpecializedAgent:
         self.status = "idle"
         self.current_task = None
         self.heartbeat_interval = 30
+        # Longest gap between status updates while a scan reports no progress
+        self.status_keepalive = 60
         self.scanner = None
+        self.event_batch_size = 128
+        self._client: Optional[httpx.AsyncClient] = None
+        # Encoded heartbeat fields that never change after registration, without the closing brace
+        self._heartbeat_prefix = self._encode_heartbeat_prefix()
         
+    def _ensure_client(self) -> httpx.AsyncClient:
+        """Return the shared control-plane client, creating it on first use."""
+        if self._client is None or self._client.is_closed:
+            # Over TLS, HTTP/2 multiplexes heartbeats, status updates and event
+            # posts on one connection; plain http:// stays on HTTP/1.1 keep-alive
+            self._client = httpx.AsyncClient(
+                base_url=self.control_plane_url,
+                timeout=30.0,
+                http2=h2 is not None,
+                limits=httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=60.0)
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the shared control-plane client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     def _get_ip_address(self) -> str:
         """Get the agent's IP address."""
         try:
@@ -51,65 +94,74 @@ class SpecializedAgent:
     async def register(self) -> bool:
         """Register this agent with the control plane."""
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.control_plane_url}/api/agents/register",
-                    json={
-                        "hostname": f"{self.hostname}-{self.agent_type}",
-                        "ip_address": self.ip_address,
-                        "capabilities": self.capabilities,
-                        "metadata": {
-                            "agent_type": self.agent_type,
-                            "os": os.name
-                        }
+            response = await self._ensure_client().post(
+                "/api/agents/register",
+                json={
+                    "hostname": f"{self.hostname}-{self.agent_type}",
+                    "ip_address": self.ip_address,
+                    "capabilities": self.capabilities,
+                    "metadata": {
+                        "agent_type": self.agent_type,
+                        "os": os.name
                     }
-                )
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    self.agent_id = data["agent_id"]
-                    print(f"✅ {self.agent_type.upper()} Agent registered: {self.agent_id}")
-                    print(f"   Hostname: {self.hostname}-{self.agent_type}")
-                    print(f"   IP: {self.ip_address}")
-                    print(f"   Capabilities: {', '.join(self.capabilities)}")
-                    return True
-                else:
-                    print(f"❌ Registration failed: {response.status_code}")
-                    return False
+                }
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                self.agent_id = data["agent_id"]
+                self._heartbeat_prefix = self._encode_heartbeat_prefix()
+                print(f"✅ {self.agent_type.upper()} Agent registered: {self.agent_id}")
+                print(f"   Hostname: {self.hostname}-{self.agent_type}")
+                print(f"   IP: {self.ip_address}")
+                print(f"   Capabilities: {', '.join(self.capabilities)}")
+                return True
+            else:
+                print(f"❌ Registration failed: {response.status_code}")
+                return False
                     
         except Exception as e:
             print(f"❌ Registration error: {e}")
             return False
     
+    def _encode_heartbeat_prefix(self) -> bytes:
+        return _dumps({"agent_id": self.agent_id})[:-1]
+    
+    def _heartbeat_body(self, status_update_only: bool = False, scan_progress: Optional[Dict[str, Any]] = None) -> bytes:
+        """Encode a heartbeat by appending the current status to the cached prefix."""
+        metrics: Dict[str, Any] = {"timestamp": time.time(), "agent_type": self.agent_type}
+        if status_update_only:
+            metrics["scan_progress"] = scan_progress
+        
+        return b"".join((
+            self._heartbeat_prefix,
+            b',"status":', _dumps(self.status),
+            b',"current_task":', _dumps(self.current_task),
+            b',"metrics":', _dumps(metrics),
+            b',"status_update_only":true}' if status_update_only else b'}'
+        ))
+    
     async def send_heartbeat(self) -> Optional[Dict[str, Any]]:
         """Send heartbeat to control plane and check for assignments."""
         if not self.agent_id:
             return None
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                response = await client.post(
-                    f"{self.control_plane_url}/api/agents/heartbeat",
-                    json={
-                        "agent_id": self.agent_id,
-                        "status": self.status,
-                        "current_task": self.current_task,
-                        "metrics": {
-                            "timestamp": datetime.utcnow().isoformat(),
-                            "agent_type": self.agent_type
-                        }
-                    }
-                )
+            response = await self._ensure_client().post(
+                "/api/agents/heartbeat",
+                content=self._heartbeat_body(),
+                headers={"content-type": "application/json"}
+            )
+            
+            if response.status_code == 200:
+                data = response.json()
+                assignment = data.get("assignment")
                 
-                if response.status_code == 200:
-                    data = response.json()
-                    assignment = data.get("assignment")
-                    
-                    if assignment:
-                        print(f"📋 New assignment received: {assignment['assignment_id']}")
-                        return assignment
-                    
-                    return None
+                if assignment:
+                    print(f"📋 New assignment received: {assignment['assignment_id']}")
+                    return assignment
+                
+                return None
                     
         except Exception as e:
             print(f"⚠️  Heartbeat error: {e}")
@@ -132,21 +184,11 @@ class SpecializedAgent:
                     'errors_count': len(self.scanner.errors)
                 }
             
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                await client.post(
-                    f"{self.control_plane_url}/api/agents/heartbeat",
-                    json={
-                        "agent_id": self.agent_id,
-                        "status": self.status,
-                        "current_task": self.current_task,
-                        "metrics": {
-                            "timestamp": datetime.utcnow().isoformat(),
-                            "agent_type": self.agent_type,
-                            "scan_progress": scan_progress
-                        },
-                        "status_update_only": True
-                    }
-                )
+            await self._ensure_client().post(
+                "/api/agents/heartbeat",
+                content=self._heartbeat_body(status_update_only=True, scan_progress=scan_progress),
+                headers={"content-type": "application/json"}
+            )
         except Exception as e:
             print(f"⚠️  Status update error: {e}")
 
@@ -182,21 +224,42 @@ class SpecializedAgent:
             # Store scanner reference for progress tracking
             self.scanner = scanner
             
-            # Run the scan with periodic progress updates
+            # Scanners that report progress signal this queue when it changes
+            progress_queue: asyncio.Queue = asyncio.Queue()
+            if hasattr(scanner, 'progress_queue'):
+                scanner.progress_queue = progress_queue
+            
+            # Run the scan, sending a status update whenever progress changes
+            # and posting any findings that have arrived since the last one
             scan_task = asyncio.create_task(scanner.scan())
+            posted = 0
             
-            # Send progress updates while scanning
             while not scan_task.done():
-                await asyncio.sleep(5)  # Update every 5 seconds
+                progress_task = asyncio.create_task(progress_queue.get())
+                done, _ = await asyncio.wait(
+                    {progress_task, scan_task},
+                    timeout=self.status_keepalive,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                progress_task.cancel()
+                if scan_task in done:
+                    break
+                
+                # Coalesce a burst of changes into a single update
+                while not progress_queue.empty():
+                    progress_queue.get_nowait()
                 await self.send_status_update()
+                
+                if len(scanner.results) > posted:
+                    new_results = scanner.results[posted:]
+                    posted += len(new_results)
+                    await self.post_events(new_results)
             
             # Wait for scan to complete
             await scan_task
             
-            # Post results to control plane
-            for result in scanner.results:
-                event_type = f"{result['scanner']}_scan"
-                await self.post_event(result['scanner'], event_type, result)
+            # Post the remaining results to control plane
+            await self.post_events(scanner.results[posted:])
             
             print(f"✅ Assignment completed: {assignment['assignment_id']}")
             print(f"   Results: {len(scanner.results)} findings")
@@ -211,26 +274,61 @@ class SpecializedAgent:
             self.scanner = None
             await self.send_status_update()
     
-    async def post_event(self, source: str, event_type: str, data: Dict[str, Any]):
-        """Post scan results as events to the control plane."""
-        try:
-            event_url = f"{self.control_plane_url}/events"
-            print(f"📤 Posting event to {event_url}: {source}/{event_type}")
+    async def post_events(self, results: List[Dict[str, Any]]):
+        """Post scan results to the control plane in bulk batches."""
+        client = self._ensure_client()
+        results_iter = iter(results)
+        
+        while True:
+            batch = list(itertools.islice(results_iter, self.event_batch_size))
+            if not batch:
+                break
             
-            async with httpx.AsyncClient(timeout=60.0) as client:
+            events = [
+                {"source": result['scanner'], "type": f"{result['scanner']}_scan", "payload": result}
+                for result in batch
+            ]
+            try:
+                print(f"📤 Posting {len(events)} events to {self.control_plane_url}/events/bulk")
                 response = await client.post(
-                    event_url,
-                    json={
-                        "source": source,
-                        "type": event_type,
-                        "payload": data
-                    }
+                    "/events/bulk",
+                    content=_dumps({"events": events}),
+                    headers={"content-type": "application/json"},
+                    timeout=60.0
                 )
                 
                 if response.status_code == 200:
-                    print(f"✅ Event posted successfully: {source}/{event_type}")
+                    print(f"✅ {len(events)} events posted successfully")
+                elif response.status_code == 404:
+                    # Control plane without the bulk endpoint
+                    for event in events:
+                        await self.post_event(event["source"], event["type"], event["payload"])
                 else:
-                    print(f"⚠️  Failed to post event: {response.status_code} - {response.text}")
+                    print(f"⚠️  Failed to post events: {response.status_code} - {response.text}")
+                    
+            except Exception as e:
+                print(f"⚠️  Error posting events: {e}")
+    
+    async def post_event(self, source: str, event_type: str, data: Dict[str, Any]):
+        """Post a single scan result as an event to the control plane."""
+        try:
+            print(f"📤 Posting event to {self.control_plane_url}/events: {source}/{event_type}")
+            
+            response = await self._ensure_client().post(
+                "/events",
+                content=_dumps({
+                    "source": source,
+                    "type": event_type,
+                    "payload": data
+                }),
+                headers={"content-type": "application/json"},
+                timeout=60.0
+            )
+            
+            if response.status_code == 200:
+                print(f"✅ Event posted successfully: {source}/{event_type}")
+            else:
+                print(f"⚠️  Failed to post event: {response.status_code} - {response.text}")
                     
         except Exception as e:
             print(f"⚠️  Error posting event: {e}")
@@ -253,11 +351,8 @@ class SpecializedAgent:
             return
         
         try:
-            async with httpx.AsyncClient(timeout=30.0) as client:
-                await client.delete(
-                    f"{self.control_plane_url}/api/agents/{self.agent_id}"
-                )
-                print(f"👋 Agent deregistered: {self.agent_id}")
+            await self._ensure_client().delete(f"/api/agents/{self.agent_id}")
+            print(f"👋 Agent deregistered: {self.agent_id}")
         except Exception as e:
             print(f"⚠️  Deregistration error: {e}")
 
@@ -277,6 +372,7 @@ async def main():
     # Register with control plane
     if not await agent.register():
         print("❌ Failed to register agent, exiting...")
+        await agent.close()
         return
     
     try:
@@ -286,6 +382,7 @@ async def main():
         print("\n⚠️  Shutting down agent...")
     finally:
         await agent.deregister()
+        await agent.close()
 
 
 if __name__ == "__main__":
@@ -4,139 +4,538 @@ No agent installation required on target Windows systems
 """
 
 import asyncio
-import subprocess
+import base64
+import concurrent.futures
+import functools
+import gzip
+import io
 import json
-from typing import Dict, Any, List
+import os
+import uuid
+import xml.etree.ElementTree as ET
+from typing import Dict, Any, Callable, Final, Iterator, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import winrm
+except ImportError:
+    winrm = None
+
+try:
+    from scanners.result_cache import ResultCache
+except ImportError:
+    from result_cache import ResultCache  # type: ignore[no-redef]
+
+
+_WSMAN_NS = {
+    'n': 'http://schemas.xmlsoap.org/ws/2004/09/enumeration',
+    'w': 'http://schemas.dmtf.org/wbem/wsman/1/wsman.xsd',
+}
+_XSI_NIL = '{http://www.w3.org/2001/XMLSchema-instance}nil'
+_WMI_RESOURCE_URI = 'http://schemas.microsoft.com/wbem/wsman/1/wmi/{namespace}/*'
+
+_WSMAN_ENVELOPE = """<s:Envelope xmlns:s="http://www.w3.org/2003/05/soap-envelope"
+ xmlns:a="http://schemas.xmlsoap.org/ws/2004/08/addressing"
+ xmlns:w="http://schemas.dmtf.org/wbem/wsman/1/wsman.xsd"
+ xmlns:n="http://schemas.xmlsoap.org/ws/2004/09/enumeration">
+<s:Header>
+<a:To>{endpoint}</a:To>
+<w:ResourceURI s:mustUnderstand="true">{resource_uri}</w:ResourceURI>
+<a:ReplyTo><a:Address s:mustUnderstand="true">http://schemas.xmlsoap.org/ws/2004/08/addressing/role/anonymous</a:Address></a:ReplyTo>
+<a:Action s:mustUnderstand="true">http://schemas.xmlsoap.org/ws/2004/09/enumeration/{action}</a:Action>
+<w:MaxEnvelopeSize s:mustUnderstand="true">512000</w:MaxEnvelopeSize>
+<a:MessageID>uuid:{message_id}</a:MessageID>
+<w:OperationTimeout>PT60S</w:OperationTimeout>
+</s:Header>
+<s:Body>{body}</s:Body>
+</s:Envelope>"""
+
+_WQL_ENUMERATE = """<n:Enumerate><w:OptimizeEnumeration/><w:MaxElements>512</w:MaxElements>
+<w:Filter Dialect="http://schemas.microsoft.com/wbem/wsman/1/WQL">{query}</w:Filter></n:Enumerate>"""
+
+_WQL_PULL = """<n:Pull><n:EnumerationContext>{context}</n:EnumerationContext>
+<n:MaxElements>512</n:MaxElements></n:Pull>"""
+
+# WMI classes queried directly over WS-Management, without starting PowerShell
+_WQL_QUERIES: Dict[str, Tuple[str, str]] = {
+    'defender': ('root/Microsoft/Windows/Defender', 'SELECT * FROM MSFT_MpThreatDetection'),
+}
+
+# Fixed query scripts, sent verbatim; credentials are bound by the WinRM transport,
+# never formatted into the script text. Each emits one JSON object per line, tagged
+# with its kind, so several can be joined into a single PowerShell invocation.
+_PS_SCRIPTS: Final[Dict[str, str]] = {
+    'software': """
+        Get-ItemProperty HKLM:\\Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\* |
+        Select-Object DisplayName, DisplayVersion, Publisher |
+        Where-Object {$_.DisplayName -ne $null} |
+        ForEach-Object { @{software=$_} | ConvertTo-Json -Compress -Depth 3 }
+        """,
+    # Hash of the same registry data, computed remotely so only 64 hex chars come back
+    'software_fingerprint': """
+        $text = Get-ItemProperty HKLM:\\Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\* |
+            ForEach-Object { "$($_.PSChildName)|$($_.DisplayName)|$($_.DisplayVersion)|$($_.Publisher)" } |
+            Sort-Object | Out-String
+        $sha = [Security.Cryptography.SHA256]::Create()
+        $hash = [BitConverter]::ToString($sha.ComputeHash([Text.Encoding]::UTF8.GetBytes($text))) -replace '-', ''
+        @{software_fingerprint=$hash} | ConvertTo-Json -Compress
+        """,
+}
+
+# Security log query for the 'events' kind, built per scanner by _events_script.
+# Only integers from the config are formatted in; the XPath filter runs in the
+# event log service, so excluded events never cross the wire.
+_PS_EVENTS_TEMPLATE = """
+        Get-WinEvent -LogName Security -FilterXPath '{xpath}' -MaxEvents {max_events} |
+        Select-Object TimeCreated, Id, {message} |
+        ForEach-Object {{ @{{events=$_}} | ConvertTo-Json -Compress -Depth 3 }}
+        """
+
+
+# Kinds whose output can run to megabytes; batches containing one are gzipped remotely
+_COMPRESSED_KINDS = frozenset({'software'})
+
+# Collects a script's output lines, gzips them and emits a single base64 line
+# prefixed with _GZIP_MARKER, so large inventories cross the WAN 5-10x smaller
+_GZIP_MARKER = b'gzip:'
+_PS_GZIP_WRAPPER = """
+$text = (& {{
+{script}
+}}) -join "`n"
+$ms = New-Object IO.MemoryStream
+$gz = New-Object IO.Compression.GZipStream($ms, [IO.Compression.CompressionLevel]::Fastest)
+$sw = New-Object IO.StreamWriter($gz, (New-Object Text.UTF8Encoding $false))
+$sw.Write($text)
+$sw.Close()
+'gzip:' + [Convert]::ToBase64String($ms.ToArray())
+"""
+
+
+def _events_script(include_ids: Tuple[int, ...], exclude_ids: Tuple[int, ...],
+                   max_events: int, max_message_len: int) -> str:
+    """Build the Security log query; an empty ``include_ids`` matches every event ID."""
+    clauses = []
+    if include_ids:
+        clauses.append('(' + ' or '.join(f'EventID={i}' for i in include_ids) + ')')
+    if exclude_ids:
+        clauses.append('not(' + ' or '.join(f'EventID={i}' for i in exclude_ids) + ')')
+    xpath = f"*[System[{' and '.join(clauses)}]]" if clauses else '*'
+    
+    message = 'Message'
+    if max_message_len:
+        message = (
+            "@{N='Message';E={if ($_.Message.Length -gt %d) {$_.Message.Substring(0, %d)} else {$_.Message}}}"
+            % (max_message_len, max_message_len)
+        )
+    return _PS_EVENTS_TEMPLATE.format(xpath=xpath, max_events=max_events, message=message)
+
+
+@functools.lru_cache(maxsize=None)
+def _batch_script(kinds: Tuple[str, ...], events_script: str = '') -> str:
+    """Join the scripts for ``kinds`` into one; built once per combination."""
+    script = '\n'.join(events_script if kind == 'events' else _PS_SCRIPTS[kind] for kind in kinds)
+    if _COMPRESSED_KINDS.intersection(kinds):
+        script = _PS_GZIP_WRAPPER.format(script=script)
+    return script
+
+
+def _decompress(data: bytes) -> bytes:
+    """Undo _PS_GZIP_WRAPPER; output without the marker is returned unchanged."""
+    data = data.strip()
+    if not data.startswith(_GZIP_MARKER):
+        return data
+    # b64decode skips any line breaks the remote host inserted
+    return gzip.decompress(base64.b64decode(data[len(_GZIP_MARKER):]))
+
+
+def _loads(data: bytes) -> Any:
+    """Parse JSON bytes, using orjson when it is installed.
+    
+    Output that is not valid UTF-8 (e.g. a legacy console code page) is
+    parsed with the undecodable bytes dropped, as before.
+    """
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(data.decode('utf-8', errors='ignore'))
+
+
+def _wmi_records(items: Optional[ET.Element]) -> Iterator[Dict[str, Any]]:
+    """Turn the class instances in a WS-Man Items element into dicts of property values."""
+    if items is None:
+        return
+    for instance in items:
+        record: Dict[str, Any] = {}
+        for prop in instance:
+            name = prop.tag.rpartition('}')[2]
+            value = None if prop.get(_XSI_NIL) == 'true' else prop.text
+            if name in record:
+                # Array properties arrive as repeated elements
+                if not isinstance(record[name], list):
+                    record[name] = [record[name]]
+                record[name].append(value)
+            else:
+                record[name] = value
+        yield record
+
+
+def _iter_ndjson(data: bytes) -> Iterator[Any]:
+    """Parse one JSON object per line without splitting the whole payload up front."""
+    for line in io.BytesIO(data):
+        line = line.strip()
+        if line:
+            yield _loads(line)
+
+
+def _scan_chunk(config: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+    """Scan one shard of targets in a worker process; returns (results, errors)."""
+    scanner = WMIScanner(config)
+    try:
+        asyncio.run(scanner.scan())
+    finally:
+        scanner.close()
+    return scanner.results, scanner.errors
 
 
 class WMIScanner:
     """Scan Windows systems using WMI and PowerShell remoting."""
     
+    # One instance per worker process when sharding; no per-instance __dict__
+    __slots__ = (
+        'config', 'results', 'errors', '_sessions', '_session_locks', '_abandoned_sessions', 'wmi_config', 'targets',
+        'cache_ttl', 'force_reindex', 'cache', 'max_message_len', 'events_script',
+    )
+    
     def __init__(self, config: Dict[str, Any] = None):
         self.config = config or {}
         self.results = []
         self.errors = []
+        # One authenticated WinRM session per (host, user), reused by every query
+        self._sessions: Dict[Tuple[str, str], Any] = {}
+        # pywinrm sessions are not thread-safe, so calls on each one are serialized
+        self._session_locks: Dict[Tuple[str, str], asyncio.Lock] = {}
+        # Sessions whose call timed out and may still be in use on a worker thread
+        self._abandoned_sessions: List[Any] = []
+        # Software inventories are reused while the host's fingerprint is unchanged; cache_ttl 0 disables
+        self.wmi_config: Dict[str, Any] = self.config.get('wmi', {})
+        self.targets: Tuple[Dict[str, Any], ...] = tuple(self.wmi_config.get('targets', ()))
+        self.cache_ttl = int(self.wmi_config.get('cache_ttl', 86400))
+        self.force_reindex = bool(self.wmi_config.get('force_reindex', False))
+        self.cache = ResultCache(self.wmi_config.get('cache_dir', '~/.cache/ai_defend'))
+        # Security events: which IDs to fetch, how many, and how much of each Message (0 = all)
+        self.max_message_len = int(self.wmi_config.get('max_message_len', 0))
+        self.events_script = _events_script(
+            tuple(int(i) for i in self.wmi_config.get('include_event_ids', (4625, 4624))),
+            tuple(int(i) for i in self.wmi_config.get('exclude_event_ids', ())),
+            int(self.wmi_config.get('max_events', 50)),
+            self.max_message_len,
+        )
+    
+    def _get_session(self, target: str, username: str, password: str):
+        """Return the cached WinRM session for ``target``, opening it on first use."""
+        key = (target, username)
+        session = self._sessions.get(key)
+        if session is None:
+            session = winrm.Session(
+                target,
+                auth=(username, password),
+                transport=self.wmi_config.get('transport', 'ntlm'),
+                read_timeout_sec=330,
+                operation_timeout_sec=300
+            )
+            self._sessions[key] = session
+        return session
+    
+    async def _call_session(self, target: str, username: str, password: str, func: Callable[..., Any], *args):
+        """Run blocking ``func(session, *args)`` on a worker thread, one call per session at a time."""
+        key = (target, username)
+        lock = self._session_locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            session = self._get_session(target, username, password)
+            try:
+                return await asyncio.wait_for(asyncio.to_thread(func, session, *args), timeout=300)
+            except asyncio.TimeoutError:
+                # The call keeps running on its thread; later calls get a fresh session,
+                # and close() shuts this one down
+                if self._sessions.get(key) is session:
+                    del self._sessions[key]
+                self._abandoned_sessions.append(session)
+                raise
+    
+    def close(self):
+        """Close all cached WinRM sessions, including ones abandoned after a timeout."""
+        for session in [*self._sessions.values(), *self._abandoned_sessions]:
+            try:
+                session.protocol.transport.close_session()
+            except Exception as e:
+                self.errors.append(f"Failed to close WinRM session: {str(e)}")
+        self._sessions.clear()
+        self._abandoned_sessions.clear()
+        self._session_locks.clear()
+    
+    def _wql_enumerate(self, session, namespace: str, query: str, limit: Optional[int]) -> List[Dict[str, Any]]:
+        """Run a WQL query as a WS-Man Enumerate/Pull sequence; blocking."""
+        protocol = session.protocol
+        resource_uri = _WMI_RESOURCE_URI.format(namespace=namespace)
+        records: List[Dict[str, Any]] = []
+        
+        action, body = 'Enumerate', _WQL_ENUMERATE.format(query=escape(query))
+        while True:
+            response = ET.fromstring(protocol.send_message(_WSMAN_ENVELOPE.format(
+                endpoint=escape(protocol.transport.endpoint),
+                resource_uri=resource_uri,
+                action=action,
+                message_id=uuid.uuid4(),
+                body=body
+            )))
+            
+            items = response.find('.//w:Items', _WSMAN_NS)
+            if items is None:
+                items = response.find('.//n:Items', _WSMAN_NS)
+            records.extend(_wmi_records(items))
+            if limit is not None and len(records) >= limit:
+                return records[:limit]
+            
+            context = response.find('.//n:EnumerationContext', _WSMAN_NS)
+            if response.find('.//w:EndOfSequence', _WSMAN_NS) is not None \
+                    or response.find('.//n:EndOfSequence', _WSMAN_NS) is not None \
+                    or context is None or not context.text:
+                return records
+            action, body = 'Pull', _WQL_PULL.format(context=escape(context.text))
+    
+    async def wql_query(
+        self,
+        target: str,
+        namespace: str,
+        query: str,
+        username: str,
+        password: str,
+        limit: Optional[int] = None
+    ) -> List[Dict[str, Any]]:
+        """Query WMI on the remote system over the cached WinRM session, without PowerShell."""
+        if winrm is None:
+            raise RuntimeError("pywinrm is not installed")
+        
+        return await self._call_session(target, username, password, self._wql_enumerate, namespace, query, limit)
     
     async def run_remote_command(self, target: str, command: str, username: str, password: str):
-        """Execute PowerShell command on remote Windows system."""
-        # Using winrm (requires pywinrm package)
-        ps_script = f"""
-        $password = ConvertTo-SecureString '{password}' -AsPlainText -Force
-        $credential = New-Object System.Management.Automation.PSCredential('{username}', $password)
-        Invoke-Command -ComputerName {target} -Credential $credential -ScriptBlock {{
-            {command}
-        }}
-        """
+        """Execute PowerShell command on remote Windows system over WinRM.
         
-        cmd = ["powershell", "-Command", ps_script]
+        stdout is returned as raw bytes so the JSON output can be parsed without decoding it first.
+        """
+        if winrm is None:
+            return {
+                "returncode": -1,
+                "stdout": b"",
+                "stderr": "pywinrm is not installed"
+            }
         
         try:
-            process = await asyncio.create_subprocess_exec(
-                *cmd,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
-            
-            stdout, stderr = await asyncio.wait_for(
-                process.communicate(),
-                timeout=300
+            # pywinrm is blocking, so run the request on a worker thread
+            result = await self._call_session(
+                target, username, password, lambda session, script: session.run_ps(script), command
             )
             
             return {
-                "returncode": process.returncode,
-                "stdout": stdout.decode('utf-8', errors='ignore'),
-                "stderr": stderr.decode('utf-8', errors='ignore')
+                "returncode": result.status_code,
+                "stdout": result.std_out,
+                "stderr": result.std_err.decode('utf-8', errors='ignore')
             }
             
         except Exception as e:
             return {
                 "returncode": -1,
-                "stdout": "",
+                "stdout": b"",
                 "stderr": str(e)
             }
     
     async def scan_windows_defender(self, target: str, username: str, password: str):
-        """Get Windows Defender scan results."""
-        command = "Get-MpThreatDetection | Select-Object -First 10 | ConvertTo-Json"
+        """Get Windows Defender threat detections straight from WMI."""
+        namespace, query = _WQL_QUERIES['defender']
+        try:
+            threats = await self.wql_query(target, namespace, query, username, password, limit=10)
+        except Exception as e:
+            self.errors.append(f"Failed to query Defender results from {target}: {str(e)}")
+            return
         
-        result = await self.run_remote_command(target, command, username, password)
+        if threats:
+            self.results.append({
+                'scanner': 'windows_defender',
+                'target': target,
+                'details': {
+                    'threats': threats,
+                    'total_threats': len(threats)
+                }
+            })
+    
+    async def _run_batch(self, target: str, kinds: Tuple[str, ...], username: str, password: str) -> Dict[str, List[Any]]:
+        """Run the scripts for ``kinds`` in one PowerShell invocation; returns its output grouped by kind."""
+        result = await self.run_remote_command(target, _batch_script(kinds, self.events_script), username, password)
         
-        if result["returncode"] == 0 and result["stdout"]:
-            try:
-                threats = json.loads(result["stdout"])
-                self.results.append({
-                    'scanner': 'windows_defender',
-                    'target': target,
-                    'details': {
-                        'threats': threats if isinstance(threats, list) else [threats],
-                        'total_threats': len(threats) if isinstance(threats, list) else 1
-                    }
-                })
-            except json.JSONDecodeError:
-                self.errors.append(f"Failed to parse Defender results from {target}")
-    
-    async def scan_installed_software(self, target: str, username: str, password: str):
-        """Get list of installed software for vulnerability assessment."""
-        command = """
-        Get-ItemProperty HKLM:\\Software\\Microsoft\\Windows\\CurrentVersion\\Uninstall\\* |
-        Select-Object DisplayName, DisplayVersion, Publisher |
-        Where-Object {$_.DisplayName -ne $null} |
-        ConvertTo-Json
+        batch: Dict[str, List[Any]] = {}
+        if not result["stdout"]:
+            return batch
+        try:
+            for record in _iter_ndjson(_decompress(result["stdout"])):
+                for kind, value in record.items():
+                    batch.setdefault(kind, []).append(value)
+        except (ValueError, OSError):
+            self.errors.append(f"Failed to parse {', '.join(kinds)} output from {target}")
+        return batch
+    
+    def _record_software(self, target: str, software: List[Dict[str, Any]]) -> Dict[str, Any]:
+        entry = {
+            'scanner': 'software_inventory',
+            'target': target,
+            'details': {
+                'software': software,
+                'total_packages': len(software)
+            }
+        }
+        self.results.append(entry)
+        return entry
+    
+    def _record_events(self, target: str, events: List[Dict[str, Any]]):
+        if self.max_message_len:
+            # The remote Substring already caps these; this covers hosts that ignore it
+            for event in events:
+                message = event.get('Message')
+                if isinstance(message, str) and len(message) > self.max_message_len:
+                    event['Message'] = message[:self.max_message_len]
+        self.results.append({
+            'scanner': 'security_events',
+            'target': target,
+            'details': {
+                'events': events,
+                'total_events': len(events)
+            }
+        })
+    
+    async def scan_host(self, target: str, username: str, password: str):
+        """Collect security events and the software inventory with one PowerShell invocation.
+        
+        When caching is on, the batch fetches the inventory fingerprint instead of
+        the inventory itself; the full listing is only requested on a cache miss.
         """
+        use_cache = self.cache_ttl > 0
+        batch = await self._run_batch(
+            target, ('events', 'software_fingerprint' if use_cache else 'software'), username, password
+        )
         
-        result = await self.run_remote_command(target, command, username, password)
+        if batch.get('events'):
+            self._record_events(target, batch['events'])
+        if use_cache:
+            fingerprints = batch.get('software_fingerprint')
+            await self.scan_installed_software(target, username, password, fingerprints[0] if fingerprints else None)
+        elif batch.get('software'):
+            self._record_software(target, batch['software'])
+    
+    async def scan_installed_software(self, target: str, username: str, password: str, fingerprint: Optional[str] = None):
+        """Get list of installed software for vulnerability assessment.
+        
+        A cheap remote fingerprint of the inventory is checked first (unless
+        one is passed in); if it matches the cached one, the cached inventory
+        is reused without transferring or parsing the full listing.
+        """
+        cache_key = None
+        if self.cache_ttl > 0:
+            if fingerprint is None:
+                fingerprints = (await self._run_batch(target, ('software_fingerprint',), username, password)).get('software_fingerprint')
+                fingerprint = fingerprints[0] if fingerprints else None
+            if fingerprint:
+                cache_key = ResultCache.make_key(scanner='software_inventory', target=target, fingerprint=fingerprint)
+                if not self.force_reindex:
+                    cached = await asyncio.to_thread(self.cache.get, cache_key)
+                    if cached is not None:
+                        self.results.extend(dict(entry, cached=True) for entry in cached)
+                        return
         
-        if result["returncode"] == 0 and result["stdout"]:
+        software = (await self._run_batch(target, ('software',), username, password)).get('software')
+        if not software:
+            return
+        entry = self._record_software(target, software)
+        
+        if cache_key is not None:
             try:
-                software = json.loads(result["stdout"])
-                self.results.append({
-                    'scanner': 'software_inventory',
-                    'target': target,
-                    'details': {
-                        'software': software if isinstance(software, list) else [software],
-                        'total_packages': len(software) if isinstance(software, list) else 1
-                    }
-                })
-            except json.JSONDecodeError:
-                self.errors.append(f"Failed to parse software list from {target}")
+                await asyncio.to_thread(self.cache.put, cache_key, [entry], self.cache_ttl)
+            except OSError as e:
+                self.errors.append(f"Failed to cache software list from {target}: {str(e)}")
     
     async def scan_security_events(self, target: str, username: str, password: str):
         """Get recent security events from Windows Event Log."""
-        command = """
-        Get-WinEvent -FilterHashtable @{LogName='Security'; ID=4625,4624} -MaxEvents 50 |
-        Select-Object TimeCreated, Id, Message |
-        ConvertTo-Json
-        """
+        events = (await self._run_batch(target, ('events',), username, password)).get('events')
+        if events:
+            self._record_events(target, events)
+    
+    async def _bounded(self, semaphore: asyncio.Semaphore, func, *args):
+        """Await ``func(*args)`` while holding a slot of ``semaphore``."""
+        async with semaphore:
+            return await func(*args)
+    
+    async def _scan_in_processes(self, targets: Tuple[Dict[str, Any], ...], processes: int):
+        """Shard ``targets`` across worker processes so result parsing uses every core."""
+        shards = [targets[i::processes] for i in range(processes)]
+        loop = asyncio.get_running_loop()
         
-        result = await self.run_remote_command(target, command, username, password)
+        with concurrent.futures.ProcessPoolExecutor(max_workers=processes) as pool:
+            futures = []
+            for shard in shards:
+                shard_config = dict(self.config, wmi=dict(self.wmi_config, targets=list(shard), processes=1))
+                futures.append(loop.run_in_executor(pool, _scan_chunk, shard_config))
+            outcomes = await asyncio.gather(*futures, return_exceptions=True)
         
-        if result["returncode"] == 0 and result["stdout"]:
-            try:
-                events = json.loads(result["stdout"])
-                self.results.append({
-                    'scanner': 'security_events',
-                    'target': target,
-                    'details': {
-                        'events': events if isinstance(events, list) else [events],
-                        'total_events': len(events) if isinstance(events, list) else 1
-                    }
-                })
-            except json.JSONDecodeError:
-                self.errors.append(f"Failed to parse events from {target}")
+        for shard, outcome in zip(shards, outcomes):
+            if isinstance(outcome, Exception):
+                hosts = ', '.join(str(t.get('host')) for t in shard)
+                self.errors.append(f"WMI scan worker failed for {hosts}: {str(outcome)}")
+            else:
+                results, errors = outcome
+                self.results.extend(results)
+                self.errors.extend(errors)
     
     async def scan(self):
-        """Scan Windows targets."""
-        targets = self.config.get('wmi', {}).get('targets', [])
+        """Scan Windows targets, running every query on every target concurrently.
         
+        With ``wmi.processes`` above 1 (0 means one per CPU), targets are split
+        across that many worker processes, each running its own event loop.
+        """
+        targets = self.targets
+        
+        processes = self.wmi_config.get('processes', 1)
+        if processes == 0:
+            processes = os.cpu_count() or 1
+        processes = min(processes, len(targets))
+        if processes > 1:
+            await self._scan_in_processes(targets, processes)
+            return
+        
+        semaphore = asyncio.Semaphore(self.wmi_config.get('max_concurrency', 16))
+        
+        calls = []
         for target_config in targets:
             target = target_config.get('host')
             username = target_config.get('username')
             password = target_config.get('password')
             
-            # Run scans
-            await self.scan_windows_defender(target, username, password)
-            await self.scan_installed_software(target, username, password)
-            await self.scan_security_events(target, username, password)
+            # Defender is read over WQL; everything else shares one PowerShell run per host
+            for scan_func in (self.scan_windows_defender, self.scan_host):
+                calls.append((scan_func, target, username, password))
+        
+        # Each query is a remote round-trip, so wall time is the slowest one rather than the sum
+        outcomes = await asyncio.gather(
+            *(self._bounded(semaphore, *call) for call in calls),
+            return_exceptions=True
+        )
+        for (scan_func, target, _, _), outcome in zip(calls, outcomes):
+            if isinstance(outcome, Exception):
+                self.errors.append(f"{scan_func.__name__} failed on {target}: {str(outcome)}")
     
     def to_dict(self) -> Dict[str, Any]:
         """Convert scan results to dictionary."""
@@ -162,7 +561,10 @@ async def main():
     }
     
     scanner = WMIScanner(config)
-    await scanner.scan()
+    try:
+        await scanner.scan()
+    finally:
+        scanner.close()
     print(json.dumps(scanner.to_dict(), indent=2))
 
 
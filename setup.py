@@ -1,25 +1,43 @@
+import os
+
 from setuptools import setup, find_packages
 
+# Optionally compile the hot log/XML parsing modules to C extensions with
+# mypyc (pip install mypy, then AI_DEFEND_MYPYC=1 pip install .).
+ext_modules = []
+if os.environ.get("AI_DEFEND_MYPYC"):
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify([
+        "--ignore-missing-imports",
+        "--implicit-optional",
+        "scanners/linux/security_scanner.py",
+        "scanners/network/network_scanner.py",
+        "scanners/log_tail.py",
+    ])
+
 setup(
     name="a_i_defend",
     version="0.1",
     packages=find_packages(),
+    ext_modules=ext_modules,
     install_requires=[
         # Add your project's dependencies here
         'fastapi',
         'uvicorn',
-        'httpx',
+        'httpx[http2]',
         'python-multipart',
         'python-jose[cryptography]',
         'passlib[bcrypt]',
         'sqlalchemy',
         'psycopg2-binary',
         'pydantic',
-        'python-multipart',
         'python-dotenv',
         'yara-python',
         'pyyaml',
         'python-magic',
         'aiofiles',
+        'orjson>=3.9',
+        "uvloop>=0.19; platform_system != 'Windows'",
     ],
 )
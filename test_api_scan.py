@@ -5,6 +5,16 @@ import sys
 from pathlib import Path
 from datetime import datetime
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx; installed with httpx[http2])
+except ImportError:
+    h2 = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Add the project root to the path so we can import our modules
 project_root = str(Path(__file__).parent)
 if project_root not in sys.path:
@@ -16,7 +26,12 @@ async def test_api_scan():
     
     # Start a new scan
     print("Starting a new scan via API...")
-    async with httpx.AsyncClient() as client:
+    # One keep-alive connection is reused for the start request and every poll
+    async with httpx.AsyncClient(
+        http2=h2 is not None,
+        limits=httpx.Limits(max_keepalive_connections=10, keepalive_expiry=60.0),
+        timeout=httpx.Timeout(30.0, connect=5.0)
+    ) as client:
         # Start the scan
         response = await client.post(
             f"{api_url}/start",
@@ -39,7 +54,8 @@ async def test_api_scan():
         scan_id = scan_data["scan_id"]
         print(f"Started scan with ID: {scan_id}")
         
-        # Poll for scan status
+        # Poll for scan status, quickly at first and backing off to every 10s
+        poll_interval = 0.5
         while True:
             response = await client.get(f"{api_url}/{scan_id}")
             if response.status_code != 200:
@@ -55,7 +71,10 @@ async def test_api_scan():
                 print(json.dumps(status_data, indent=2))
                 break
                 
-            await asyncio.sleep(2)
+            await asyncio.sleep(poll_interval)
+            poll_interval = min(poll_interval * 2, 10.0)
 
 if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(test_api_scan())
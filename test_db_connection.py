@@ -1,24 +1,36 @@
 import asyncpg
 import asyncio
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 async def test_connection():
     try:
-        conn = await asyncpg.connect(
+        pool = await asyncpg.create_pool(
             user="postgres",
             password="changeit",
             host="localhost",
             port=5432,
-            database="defense"
+            database="defense",
+            min_size=1,
+            max_size=5
         )
         print("✅ Successfully connected to the database!")
         
-        # Test a simple query
-        version = await conn.fetchval('SELECT version()')
-        print(f"PostgreSQL version: {version}")
-        
-        await conn.close()
+        try:
+            # Test a simple query
+            async with pool.acquire() as conn:
+                version = await conn.fetchval('SELECT version()')
+            print(f"PostgreSQL version: {version}")
+        finally:
+            await pool.close()
     except Exception as e:
         print(f"❌ Failed to connect to the database: {e}")
 
 # Run the test
-asyncio.get_event_loop().run_until_complete(test_connection())
+if __name__ == "__main__":
+    if uvloop is not None:
+        uvloop.install()
+    asyncio.run(test_connection())
@@ -0,0 +1,34 @@
+import sys
+from pathlib import Path
+
+import pytest
+
+project_root = str(Path(__file__).parent)
+if project_root not in sys.path:
+    sys.path.append(project_root)
+
+pytest.importorskip("httpx")
+pytest.importorskip("yara")
+
+from scanners.linux.security_scanner import _parse_fast_log_line
+
+PREFIX = b"01/01-12:00:00.123456  [**] [1:1000001:1] TEST Alert [**] [Classification: Generic Event] [Priority: 3] "
+
+
+@pytest.mark.parametrize("endpoints, source_ip, dest_ip", [
+    (b"{TCP} 192.168.1.1:1234 -> 192.168.1.2:80", "192.168.1.1", "192.168.1.2"),
+    (b"{ICMP} 192.168.1.1 -> 192.168.1.2", "192.168.1.1", "192.168.1.2"),
+    (b"{IPV6-ICMP} fe80::1 -> ff02::1", "fe80::1", "ff02::1"),
+    (b"{TCP} [2001:db8::1]:51000 -> [2001:db8::5]:443", "2001:db8::1", "2001:db8::5"),
+    (b"{TCP} 2001:db8::1:51000 -> 2001:db8::5:443", "2001:db8::1:51000", "2001:db8::5:443"),
+])
+def test_fast_log_endpoints(endpoints, source_ip, dest_ip):
+    alert = _parse_fast_log_line(PREFIX + endpoints)
+    assert alert is not None
+    assert alert["severity"] == 3
+    assert alert["signature"] == "TEST Alert"
+    assert (alert["source_ip"], alert["dest_ip"]) == (source_ip, dest_ip)
+
+
+def test_fast_log_skips_non_alert_lines():
+    assert _parse_fast_log_line(b"suricata started") is None
@@ -31,7 +31,7 @@ async def main():
     
     # Print results
     print(f"\nScan {'completed successfully' if success else 'failed'}")
-    print(f"Results saved to: {manager.save_results('test_scan/results.json')}")
+    print(f"Results saved to: {await manager.save_results('test_scan/results.json')}")
     
     # Print any errors
     if manager.errors:
@@ -2,6 +2,18 @@ import asyncio
 import json
 from pathlib import Path
 
+import aiofiles
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 # Add the project root to the path so we can import our modules
 import sys
 from pathlib import Path
@@ -42,8 +54,12 @@ async def test_security_scan():
         
         # Save results
         output_file = "test_scan_results.json"
-        with open(output_file, 'w') as f:
-            json.dump(scanner.to_dict(), f, indent=2)
+        if orjson is not None:
+            data = orjson.dumps(scanner.to_dict(), option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(scanner.to_dict(), indent=2).encode()
+        async with aiofiles.open(output_file, 'wb') as f:
+            await f.write(data)
         
         print(f"\nScan {'completed successfully' if success else 'failed'}")
         print(f"Results saved to: {output_file}")
@@ -80,4 +96,6 @@ if __name__ == "__main__":
     os.makedirs("test_scan", exist_ok=True)
     
     # Run the test scan
+    if uvloop is not None:
+        uvloop.install()
     asyncio.run(test_security_scan())